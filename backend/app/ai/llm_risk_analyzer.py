@@ -1,17 +1,38 @@
 
 import json
 import re
+import time
 import asyncio
-from typing import List, Optional
+import hashlib
+from typing import Callable, List, Optional
 
+import redis
 from pydantic import BaseModel, ValidationError
 from openai import AsyncOpenAI
 from app.config.settings import settings
+from app.cache.redis_cache import redis_cache
+from app.cache.shared_state import incr_metric
+from app.utils.profiling import stage, timed_io, event
 
 
 # OpenAI Client
 client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
+
+# Prompt template versions — bump when a prompt's wording changes so cached
+# completions for the old wording are no longer reused.
+PROMPT_VERSIONS = {
+    "compress": "1",
+    "json_fix": "1",
+    "final": "1",
+}
+
+# USD per 1M tokens (input, output), used for the "dollars saved" counter
+MODEL_PRICES = {
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
 # Output Schema
 class LLMResponse(BaseModel):
     risk_level: str
@@ -53,6 +74,126 @@ def normalize_risk(parsed: dict):
     return parsed
 
 
+# LLM Call Cache (content-addressed)
+#
+# Key = sha256(model, template, template version, input). Identical feed
+# chunks, JSON repairs and final prompts are answered from Redis instead of
+# the API. Entries expire after LLM_CACHE_TTL and the oldest are evicted
+# once LLM_CACHE_MAX_ENTRIES is exceeded (insertion-ordered ZSET index).
+
+LLM_CACHE_PREFIX = "ipintel:llm"
+LLM_CACHE_INDEX = "ipintel:llm:index"
+
+
+def llm_cache_key(model: str, template: str, payload: str) -> str:
+    digest = hashlib.sha256(
+        "\0".join([model, template, PROMPT_VERSIONS[template], payload]).encode()
+    ).hexdigest()
+    return f"{LLM_CACHE_PREFIX}:{digest}"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+
+def _llm_cache_get(key: str) -> Optional[dict]:
+    try:
+        raw = redis_cache.client.get(key)
+        return json.loads(raw) if raw else None
+    except (redis.RedisError, ValueError):
+        return None
+
+
+def _llm_cache_put(key: str, entry: dict):
+    try:
+        pipe = redis_cache.client.pipeline(transaction=False)
+        pipe.set(key, json.dumps(entry), ex=settings.LLM_CACHE_TTL)
+        pipe.zadd(LLM_CACHE_INDEX, {key: time.time()})
+        pipe.zcard(LLM_CACHE_INDEX)
+        size = pipe.execute()[-1]
+
+        excess = size - settings.LLM_CACHE_MAX_ENTRIES
+        if excess > 0:
+            evicted = [k for k, _ in redis_cache.client.zpopmin(LLM_CACHE_INDEX, excess)]
+            if evicted:
+                redis_cache.client.delete(*evicted)
+    except redis.RedisError as e:
+        print("[LLM CACHE] Store failed:", e)
+
+
+async def cached_completion(
+    model: str,
+    template: str,
+    payload: str,
+    prompt: str,
+    temperature: float,
+    cacheable: Callable[[str], bool] = lambda raw: True,
+) -> str:
+    """
+    Chat completion through the content-addressed cache.
+    Only responses accepted by `cacheable` are stored, so a malformed
+    answer is never replayed to the retry that follows it.
+    """
+    key = llm_cache_key(model, template, payload)
+
+    if settings.LLM_CACHE_ENABLED:
+        hit = _llm_cache_get(key)
+        if hit is not None:
+            event("llm_cache_hit", template=template, model=model)
+            incr_metric("llm_cache_hits")
+            incr_metric("llm_tokens_saved", hit.get("total_tokens", 0))
+            incr_metric("llm_dollars_saved", float(hit.get("cost", 0.0)))
+            return hit["content"]
+        incr_metric("llm_cache_misses")
+
+    response = await timed_io(
+        f"llm:{template}",
+        client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature
+        ),
+        model=model,
+    )
+    raw = response.choices[0].message.content
+
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    event("llm_usage", template=template, model=model, tokens=prompt_tokens + completion_tokens)
+    incr_metric("llm_tokens_used", prompt_tokens + completion_tokens)
+    incr_metric("llm_dollars_spent", float(cost))
+
+    if settings.LLM_CACHE_ENABLED and raw and cacheable(raw):
+        _llm_cache_put(key, {
+            "content": raw,
+            "model": model,
+            "template": template,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": cost,
+        })
+
+    return raw
+
+
+def _parses(raw: str) -> bool:
+    return extract_json(raw) is not None
+
+
+def _valid_assessment(raw: str) -> bool:
+    parsed = extract_json(raw)
+    if not parsed:
+        return False
+    try:
+        LLMResponse(**normalize_risk(dict(parsed)))
+        return True
+    except (ValidationError, TypeError, AttributeError):
+        return False
+
+
 # Chunk Text
 def chunk_text(text: str, size=2000):
     return [text[i:i + size] for i in range(0, len(text), size)]
@@ -79,12 +220,7 @@ Return ONLY JSON:
 """
 
     try:
-        response = await client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        raw = response.choices[0].message.content
+        raw = await cached_completion(model, "compress", text_chunk, prompt, 0.1, cacheable=_parses)
         return extract_json(raw)
 
     except Exception as e:
@@ -104,12 +240,8 @@ Return ONLY valid JSON:
 """
 
     try:
-        resp = await client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
-        )
-        return extract_json(resp.choices[0].message.content)
+        raw = await cached_completion(model, "json_fix", broken_text, prompt, 0, cacheable=_parses)
+        return extract_json(raw)
     except:
         return None
 
@@ -137,7 +269,8 @@ async def generate_risk_assessment(full_dataset: dict):
         # 1. Compress all chunks in parallel
         # --------------------------------------------------------
         tasks = [compress_chunk(model_name, ch) for ch in chunks]
-        compressed = await asyncio.gather(*tasks)
+        with stage("llm_compress", model=model_name, chunks=len(chunks)):
+            compressed = await asyncio.gather(*tasks)
 
         compressed = [c for c in compressed if c]
 
@@ -178,13 +311,10 @@ Using ALL indicators, produce STRICT JSON ONLY:
             print(f"[LLM] Final attempt {attempt+1} on model {model_name}")
 
             try:
-                response = await client.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": final_prompt}],
-                    temperature=0.1
+                raw = await cached_completion(
+                    model_name, "final", compressed_json, final_prompt, 0.1,
+                    cacheable=_valid_assessment
                 )
-
-                raw = response.choices[0].message.content
                 parsed = extract_json(raw)
 
                 # Try repair if invalid JSON
@@ -193,16 +323,19 @@ Using ALL indicators, produce STRICT JSON ONLY:
 
                 if not parsed:
                     print("[LLM] JSON extraction FAILED")
+                    event("llm_attempt", model=model_name, attempt=attempt + 1, outcome="invalid_json")
                     continue
 
                 parsed = normalize_risk(parsed)
                 parsed["model_used"] = model_name
 
                 validated = LLMResponse(**parsed)
+                event("llm_attempt", model=model_name, attempt=attempt + 1, outcome="ok")
                 return validated.model_dump()
 
             except Exception as e:
                 print("[LLM ERROR]", e)
+                event("llm_attempt", model=model_name, attempt=attempt + 1, outcome=type(e).__name__)
                 continue
 
     # --------------------------------------------------------
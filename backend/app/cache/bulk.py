@@ -0,0 +1,135 @@
+import json
+import sys
+import time
+from typing import IO, Iterator, List, Optional
+
+from app.cache.redis_cache import redis_cache
+from app.config.settings import settings
+
+
+# Bulk export / import of the verdict store.
+#
+# Format: JSON Lines, one entry per line:
+#   {"key": "ipintel:v1:openai:8.8.8.8", "ttl": 81234, "value": {...}}
+# `ttl` is the remaining lifetime in seconds (null = no expiry).
+# Reads and writes are batched through Redis pipelines so a dump of
+# hundreds of thousands of keys costs a few hundred round-trips, not one
+# per key.
+
+
+def verdict_pattern(version: Optional[str] = None) -> str:
+    return f"ipintel:{version or settings.CACHE_VERSION}:*"
+
+
+class Progress:
+    """
+    Periodic progress line with throughput.
+    """
+    def __init__(self, label: str, total: Optional[int] = None, every: float = 2.0):
+        self.label = label
+        self.total = total
+        self.every = every
+        self.count = 0
+        self.start = time.perf_counter()
+        self._last = self.start
+
+    def advance(self, n: int = 1, **extra):
+        self.count += n
+        now = time.perf_counter()
+        if now - self._last >= self.every:
+            self._last = now
+            self.report(**extra)
+
+    def report(self, **extra):
+        elapsed = time.perf_counter() - self.start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        total = f"/{self.total}" if self.total else ""
+        details = "".join(f" {k}={v}" for k, v in extra.items())
+        # stderr so `export -` can stream the dump on stdout
+        print(f"[{self.label}] {self.count}{total} in {elapsed:.1f}s ({rate:.1f}/s){details}", file=sys.stderr)
+
+
+def scan_keys(pattern: str, batch: int = 500) -> Iterator[List[str]]:
+    """
+    Yield keys matching `pattern` in batches (SCAN, never KEYS).
+    """
+    keys = []
+    for key in redis_cache.client.scan_iter(match=pattern, count=batch):
+        keys.append(key)
+        if len(keys) >= batch:
+            yield keys
+            keys = []
+    if keys:
+        yield keys
+
+
+def export_entries(out: IO[str], pattern: Optional[str] = None, batch: int = 500) -> int:
+    pattern = pattern or verdict_pattern()
+    progress = Progress("EXPORT")
+
+    for keys in scan_keys(pattern, batch):
+        pipe = redis_cache.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.get(key)
+            pipe.ttl(key)
+        results = pipe.execute()
+
+        written = 0
+        for key, raw, ttl in zip(keys, results[0::2], results[1::2]):
+            if raw is None or ttl == -2:  # expired between SCAN and GET
+                continue
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                continue
+            out.write(json.dumps({"key": key, "ttl": ttl if ttl > 0 else None, "value": value}) + "\n")
+            written += 1
+
+        progress.advance(written)
+
+    progress.report()
+    return progress.count
+
+
+def import_entries(
+    src: IO[str],
+    batch: int = 500,
+    overwrite: bool = False,
+    default_ttl: Optional[int] = None,
+) -> int:
+    """
+    Load an export back into Redis. Existing keys are kept unless
+    `overwrite` is set; entries without a TTL get `default_ttl`
+    (CACHE_TTL when unset).
+    """
+    default_ttl = default_ttl or settings.CACHE_TTL
+    progress = Progress("IMPORT")
+    pipe = redis_cache.client.pipeline(transaction=False)
+    pending = 0
+
+    def flush():
+        nonlocal pipe, pending
+        if pending:
+            written = sum(1 for ok in pipe.execute() if ok)
+            progress.advance(written)
+        pipe = redis_cache.client.pipeline(transaction=False)
+        pending = 0
+
+    for line in src:
+        line = line.strip()
+        if not line:
+            continue
+        entry = json.loads(line)
+        pipe.set(
+            entry["key"],
+            json.dumps(entry["value"]),
+            ex=entry.get("ttl") or default_ttl,
+            nx=not overwrite,
+        )
+        pending += 1
+        if pending >= batch:
+            flush()
+
+    flush()
+    progress.report()
+    return progress.count
@@ -0,0 +1,247 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import redis
+
+from app.cache.redis_cache import redis_cache, make_cache_key
+from app.config.settings import settings
+
+
+# Schema-Versioned Cache Entries
+#
+# Every cached verdict carries "_schema". When the entry shape changes, bump
+# CACHE_SCHEMA_VERSION and register an upgrade from the previous version
+# instead of bumping CACHE_VERSION (which orphans the whole keyspace).
+# Old entries are upgraded transparently on read, and in bulk by `sweep()`.
+#
+# An upgrade returns the new entry, or None when the entry cannot be
+# salvaged (its inputs really changed) and must be recomputed.
+
+CACHE_SCHEMA_VERSION = 2
+
+# Entries written before schema stamping existed
+LEGACY_SCHEMA = 1
+
+Migration = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+MIGRATIONS: Dict[int, Migration] = {}
+
+
+def register_migration(from_version: int):
+    """
+    Register an upgrade from `from_version` to `from_version + 1`.
+    """
+    def decorator(func: Migration) -> Migration:
+        MIGRATIONS[from_version] = func
+        return func
+    return decorator
+
+
+def schema_of(entry: Dict[str, Any]) -> int:
+    return int(entry.get("_schema", LEGACY_SCHEMA))
+
+
+def stamp(entry: Dict[str, Any]) -> Dict[str, Any]:
+    return {**entry, "_schema": CACHE_SCHEMA_VERSION, "cached_at": int(time.time())}
+
+
+def migrate_entry(entry: Any) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Upgrade `entry` to CACHE_SCHEMA_VERSION.
+    Returns (entry, changed); entry is None if it must be recomputed.
+    """
+    if not isinstance(entry, dict):
+        return None, True
+
+    version = schema_of(entry)
+    if version > CACHE_SCHEMA_VERSION:
+        # Written by a newer deployment (rolling upgrade) → leave it alone
+        return entry, False
+
+    changed = False
+    while version < CACHE_SCHEMA_VERSION:
+        upgrade = MIGRATIONS.get(version)
+        if upgrade is None:
+            return None, True
+        entry = upgrade(dict(entry))
+        if entry is None:
+            return None, True
+        version += 1
+        entry["_schema"] = version
+        changed = True
+
+    return entry, changed
+
+
+
+# Registered Upgrades
+
+@register_migration(1)
+def _v1_to_v2(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    v1 → v2:
+    - Verdicts from the retired Gemini pipeline or without a model are
+      dropped (they have to be recomputed).
+    - risk_level casing normalized, confidence coerced to float.
+    - Network fields added to the normalized block (ipapi asn/network).
+    """
+    model = str(entry.get("model_used")).lower()
+    if "gemini" in model or model in ("none", "null"):
+        return None
+    if "gemini" in str(entry.get("risk_analysis", "")).lower():
+        return None
+
+    level = str(entry.get("risk_level", "")).capitalize()
+    if level not in ("Low", "Medium", "High"):
+        return None
+    entry["risk_level"] = level
+
+    try:
+        entry["confidence"] = float(entry.get("confidence"))
+    except (TypeError, ValueError):
+        return None
+
+    entry.setdefault("asn", None)
+    entry.setdefault("network", None)
+    return entry
+
+
+
+# Read Path
+
+def legacy_keys(ip: str, model: str) -> List[str]:
+    return [make_cache_key(ip, model, version=v) for v in settings.CACHE_LEGACY_VERSIONS]
+
+
+def load_entry(ip: str, model: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a verdict, upgrading it in place if it is on an older schema.
+    Falls back to CACHE_LEGACY_VERSIONS namespaces and moves hits forward
+    into the current namespace with their remaining TTL.
+    """
+    key = make_cache_key(ip, model)
+    entry = redis_cache.get(key)
+    source = key
+
+    if entry is None:
+        for old_key in legacy_keys(ip, model):
+            entry = redis_cache.get(old_key)
+            if entry is not None:
+                source = old_key
+                break
+
+    if entry is None:
+        return None
+
+    migrated, changed = migrate_entry(entry)
+    client = redis_cache.client
+
+    if migrated is None:
+        print(f"[CACHE] Entry {source} cannot be migrated → deleting")
+        client.delete(source)
+        return None
+
+    if source != key:
+        ttl = client.ttl(source)
+        client.set(key, json.dumps(migrated), ex=ttl if ttl > 0 else settings.CACHE_TTL)
+        client.delete(source)
+        print(f"[CACHE] Moved {source} → {key}")
+    elif changed:
+        client.set(key, json.dumps(migrated), keepttl=True)
+        print(f"[CACHE] Migrated {key} to schema v{CACHE_SCHEMA_VERSION}")
+
+    return migrated
+
+
+
+# Background Sweep
+
+def sweep(batch: int = 500) -> Dict[str, int]:
+    """
+    Walk the current and legacy namespaces with SCAN and migrate every entry
+    in pipelined batches, so reads after a deploy rarely pay for an upgrade.
+    """
+    from app.cache.bulk import Progress, scan_keys, verdict_pattern
+
+    stats = {"scanned": 0, "migrated": 0, "moved": 0, "deleted": 0}
+    progress = Progress("MIGRATE")
+    client = redis_cache.client
+    current_prefix = f"ipintel:{settings.CACHE_VERSION}:"
+
+    versions = [settings.CACHE_VERSION] + list(settings.CACHE_LEGACY_VERSIONS)
+    for version in versions:
+        for keys in scan_keys(verdict_pattern(version), batch):
+            raws = client.mget(keys)
+            ttls = client.pipeline(transaction=False)
+            for key in keys:
+                ttls.ttl(key)
+            ttls = ttls.execute()
+
+            pipe = client.pipeline(transaction=False)
+            for key, raw, ttl in zip(keys, raws, ttls):
+                if raw is None:
+                    continue
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    entry = None
+
+                migrated, changed = migrate_entry(entry)
+
+                if migrated is None:
+                    pipe.delete(key)
+                    stats["deleted"] += 1
+                elif not key.startswith(current_prefix):
+                    new_key = current_prefix + key.split(":", 2)[2]
+                    pipe.set(new_key, json.dumps(migrated), ex=ttl if ttl > 0 else settings.CACHE_TTL, nx=True)
+                    pipe.delete(key)
+                    stats["moved"] += 1
+                elif changed:
+                    pipe.set(key, json.dumps(migrated), keepttl=True)
+                    stats["migrated"] += 1
+
+            pipe.execute()
+            stats["scanned"] += len(keys)
+            progress.advance(len(keys), **stats)
+
+    progress.report(**stats)
+    return stats
+
+
+def sweep_done_key() -> str:
+    """
+    Done marker for one (schema, namespace, legacy namespaces) combination,
+    so a later bump of any of them triggers a new sweep.
+    """
+    legacy = ",".join(settings.CACHE_LEGACY_VERSIONS) or "-"
+    return f"ipintel:migration-sweep:done:{CACHE_SCHEMA_VERSION}:{settings.CACHE_VERSION}:{legacy}"
+
+
+def run_sweep_once():
+    """
+    Sweep guarded by a cross-worker lock so only one process does the work,
+    and only once per deployment: a done marker stops workers that restart
+    later from re-running the full SCAN.
+    """
+    from app.cache.shared_state import acquire_lock, release_lock
+
+    client = redis_cache.client
+    done_key = sweep_done_key()
+
+    if client.exists(done_key):
+        return None
+
+    token = acquire_lock("migration-sweep", ttl=3600)
+    if token is None:
+        return None
+    try:
+        if client.exists(done_key):
+            return None
+        stats = sweep()
+        client.set(done_key, json.dumps({**stats, "finished_at": int(time.time())}))
+        return stats
+    except redis.RedisError as e:
+        print(f"[CACHE] Migration sweep failed: {e}")
+        return None
+    finally:
+        release_lock("migration-sweep", token)
@@ -5,13 +5,14 @@ from app.config.settings import settings
 
 
 # Cache Key Builder (Versioned)
-def make_cache_key(ip: str, model: str = "unknown") -> str:
+def make_cache_key(ip: str, model: str = "unknown", version: Optional[str] = None) -> str:
     """
     Build a versioned, safe Redis key.
     Format:
       ipintel:<version>:<model>:<ip>
+    `version` defaults to the current CACHE_VERSION namespace.
     """
-    version = settings.CACHE_VERSION
+    version = version or settings.CACHE_VERSION
     return f"ipintel:{version}:{model}:{ip}"
 
 
@@ -0,0 +1,109 @@
+import time
+import uuid
+from typing import Dict, Optional
+
+import redis
+
+from app.cache.redis_cache import redis_cache
+
+
+# All cross-request state lives in Redis so it is shared by every worker
+# process (gunicorn forks one interpreter per core; module-level dicts would
+# silently diverge between them).
+
+LOCK_PREFIX = "ipintel:lock"
+METRICS_KEY = "ipintel:metrics"
+RATELIMIT_PREFIX = "ipintel:ratelimit"
+
+
+# Distributed Lock (single-flight)
+def acquire_lock(name: str, ttl: int) -> Optional[str]:
+    """
+    Try to take a cross-worker lock.
+    Returns an owner token on success, None if someone else holds it.
+    Fails open (returns a token) when Redis is unreachable so a cache outage
+    never blocks analysis.
+    """
+    token = uuid.uuid4().hex
+    try:
+        acquired = redis_cache.client.set(f"{LOCK_PREFIX}:{name}", token, nx=True, ex=ttl)
+    except redis.RedisError as e:
+        print(f"[SHARED] Lock backend unavailable ({e}) → proceeding without lock")
+        return token
+
+    return token if acquired else None
+
+
+def release_lock(name: str, token: str):
+    """
+    Release a lock only if we still own it (the TTL may have expired and
+    another worker may have re-acquired it in the meantime).
+    """
+    key = f"{LOCK_PREFIX}:{name}"
+    try:
+        with redis_cache.client.pipeline() as pipe:
+            pipe.watch(key)
+            if pipe.get(key) != token:
+                pipe.unwatch()
+                return
+            pipe.multi()
+            pipe.delete(key)
+            pipe.execute()
+    except redis.WatchError:
+        pass
+    except redis.RedisError as e:
+        print(f"[SHARED] Lock release failed: {e}")
+
+
+def is_locked(name: str) -> bool:
+    try:
+        return bool(redis_cache.client.exists(f"{LOCK_PREFIX}:{name}"))
+    except redis.RedisError:
+        return False
+
+
+# Metrics (cross-worker counters)
+def incr_metric(name: str, amount: float = 1):
+    try:
+        if isinstance(amount, float):
+            redis_cache.client.hincrbyfloat(METRICS_KEY, name, amount)
+        else:
+            redis_cache.client.hincrby(METRICS_KEY, name, amount)
+    except redis.RedisError:
+        pass
+
+
+def get_metrics() -> Dict[str, float]:
+    try:
+        raw = redis_cache.client.hgetall(METRICS_KEY)
+    except redis.RedisError as e:
+        return {"error": str(e)}
+
+    metrics = {}
+    for name, value in raw.items():
+        number = float(value)
+        metrics[name] = int(number) if number.is_integer() else number
+    return metrics
+
+
+# Rate Limiting (fixed window)
+def rate_limit_allow(client_id: str, limit: int, window: int = 60) -> bool:
+    """
+    Count a request against `client_id` in the current window.
+    Returns False once `limit` is exceeded. Fails open on Redis errors.
+    """
+    if limit <= 0:
+        return True
+
+    bucket = int(time.time() // window)
+    key = f"{RATELIMIT_PREFIX}:{client_id}:{bucket}"
+
+    try:
+        pipe = redis_cache.client.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, window)
+        count, _ = pipe.execute()
+    except redis.RedisError:
+        return True
+
+    return count <= limit
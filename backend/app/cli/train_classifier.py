@@ -0,0 +1,97 @@
+# project/backend/app/cli/train_classifier.py
+#
+# Distil cached LLM verdicts into the local classifier.
+#
+# Usage (from backend/):
+#   python -m app.cli.train_classifier --out models/local_risk.npz --report report.json
+#
+# Then serve it with LOCAL_MODEL_PATH=models/local_risk.npz.
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from app.ai.local_classifier import (
+    CLASSES, FEATURES, build_dataset, calibrate_temperature, evaluate, train
+)
+from app.cache.bulk import Progress, scan_keys, verdict_pattern
+from app.cache.redis_cache import redis_cache
+from app.config.settings import settings
+
+
+def load_dataset(pattern: str, batch: int = 1000):
+    """
+    Stream cached verdicts (SCAN + MGET in batches) into (features, labels).
+    Each batch is reduced to feature rows right away, so memory holds one
+    batch of full verdicts at a time, not the whole keyspace.
+    """
+    progress = Progress("LOAD")
+    X_parts, y_parts = [], []
+    labelled = 0
+    for keys in scan_keys(pattern, batch):
+        entries = []
+        for raw in redis_cache.client.mget(keys):
+            if raw:
+                try:
+                    entries.append(json.loads(raw))
+                except ValueError:
+                    continue
+        X, y = build_dataset(entries)
+        if len(y):
+            X_parts.append(X)
+            y_parts.append(y)
+            labelled += len(y)
+        progress.advance(len(keys), labelled=labelled)
+    progress.report(labelled=labelled)
+
+    if not y_parts:
+        return np.zeros((0, len(FEATURES))), np.zeros(0, dtype=int)
+    return np.vstack(X_parts), np.concatenate(y_parts)
+
+
+def split(n: int, seed: int, val: float, test: float):
+    order = np.random.default_rng(seed).permutation(n)
+    n_test, n_val = int(n * test), int(n * val)
+    return order[n_test + n_val:], order[n_test:n_test + n_val], order[:n_test]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the local risk classifier from cached LLM verdicts")
+    parser.add_argument("--out", default="models/local_risk.npz")
+    parser.add_argument("--report", default=None, help="Write the evaluation report as JSON")
+    parser.add_argument("--pattern", default=None, help="Key pattern (default: current CACHE_VERSION)")
+    parser.add_argument("--threshold", type=float, default=settings.LOCAL_MODEL_THRESHOLD)
+    parser.add_argument("--l2", type=float, default=1e-3)
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    X, y = load_dataset(args.pattern or verdict_pattern())
+    print(f"[TRAIN] {len(y)} LLM-labelled verdicts → "
+          + ", ".join(f"{c}={int((y == i).sum())}" for i, c in enumerate(CLASSES)))
+
+    if len(y) < 50:
+        raise SystemExit("[TRAIN] Not enough labelled verdicts (need at least 50)")
+
+    train_idx, val_idx, test_idx = split(len(y), args.seed, val=0.15, test=0.15)
+
+    model = train(X[train_idx], y[train_idx], l2=args.l2, epochs=args.epochs)
+    temperature = calibrate_temperature(model, X[val_idx], y[val_idx])
+    report = evaluate(model, X[test_idx], y[test_idx], args.threshold)
+
+    print(f"[TRAIN] temperature={temperature:.3f}")
+    print(json.dumps(report, indent=2))
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    model.save(args.out)
+    print(f"[TRAIN] Saved model → {args.out}")
+
+    if args.report:
+        with open(args.report, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# project/backend/app/cli/warm_cache.py
+#
+# Cache warm-up and bulk import/export tooling.
+#
+# Usage (from backend/):
+#   python -m app.cli.warm_cache warm access.log --concurrency 8 --rate 5
+#   python -m app.cli.warm_cache export verdicts.jsonl
+#   python -m app.cli.warm_cache import verdicts.jsonl [--overwrite]
+#   python -m app.cli.warm_cache backfill-networks
+#   python -m app.cli.warm_cache migrate
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import re
+import sys
+import time
+from typing import Iterable, List
+
+from app.cache.bulk import Progress, export_entries, import_entries, scan_keys, verdict_pattern
+from app.cache.redis_cache import redis_cache
+from app.utils.ip_validator import validate_ips
+
+
+# Cache key dump line: ipintel:<version>:<model>:<ip>
+KEY_LINE = re.compile(r"^ipintel:[^:]+:[^:]+:(\S+)$")
+TOKEN_SPLIT = re.compile(r"[\s,;\"'\[\]()<>=]+")
+
+
+def extract_ips(lines: Iterable[str]) -> List[str]:
+    """
+    Pull analyzable IPs out of access logs, plain IP lists or cache key
+    dumps. Keeps first-seen order, drops duplicates and anything
+    validate_ips rejects (private, reserved, malformed).
+    """
+    candidates = {}
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        match = KEY_LINE.match(line)
+        tokens = [match.group(1)] if match else TOKEN_SPLIT.split(line)
+
+        for token in tokens:
+            if "." in token or ":" in token:
+                candidates.setdefault(token, None)
+
+    # One vectorized pass instead of an ipaddress object per token
+    tokens = list(candidates)
+    valid, _ = validate_ips(tokens)
+
+    seen = set()
+    ips = []
+    for token, ok in zip(tokens, valid):
+        if ok:
+            ip = str(ipaddress.ip_address(token))
+            if ip not in seen:
+                seen.add(ip)
+                ips.append(ip)
+
+    return ips
+
+
+class RateLimiter:
+    """
+    Token bucket shared by all warm-up workers (`rate` starts per second).
+    """
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def warm(ips: List[str], concurrency: int = 4, rate: float = 2.0, force: bool = False):
+    """
+    Replay IPs through the full pipeline to pre-populate the cache.
+    Already-cached IPs are skipped (no rate budget spent) unless `force`.
+    """
+    # Imported here so export/import work without LLM credentials
+    from app.services.ip_analyzer_service import analyze_ip, get_valid_cached
+    from app.services.admission import request_client, request_priority, BULK, OverloadedError
+
+    # Warm-up yields to interactive traffic (admission reserves headroom)
+    request_client.set("warm-cache")
+    request_priority.set(BULK)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    limiter = RateLimiter(rate)
+    progress = Progress("WARM", total=len(ips))
+    stats = {"analyzed": 0, "skipped": 0, "failed": 0}
+
+    async def run(ip: str):
+        async with semaphore:
+            if not force and get_valid_cached(ip) is not None:
+                stats["skipped"] += 1
+            else:
+                await limiter.wait()
+                try:
+                    try:
+                        result = await analyze_ip(ip)
+                    except OverloadedError as e:
+                        # Service busy with interactive traffic → back off and retry once
+                        await asyncio.sleep(e.retry_after)
+                        result = await analyze_ip(ip)
+                    stats["failed" if result.get("risk_level") == "unknown" else "analyzed"] += 1
+                except Exception as e:
+                    print(f"[WARM] {ip} failed: {e}")
+                    stats["failed"] += 1
+            progress.advance(**stats)
+
+    await asyncio.gather(*(run(ip) for ip in ips))
+    progress.report(**stats)
+    return stats
+
+
+def backfill_networks(batch: int = 500) -> int:
+    """
+    Rebuild prefix/ASN aggregates from every cached verdict.
+    """
+    from app.services.network_reputation import record_verdict
+
+    progress = Progress("BACKFILL")
+    for keys in scan_keys(verdict_pattern(), batch):
+        for entry in redis_cache.client.mget(keys):
+            if entry:
+                record_verdict(json.loads(entry))
+        progress.advance(len(keys))
+    progress.report()
+    return progress.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="IP intel cache tooling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_warm = sub.add_parser("warm", help="Replay IPs from a log / list / key dump")
+    p_warm.add_argument("source", help="File path or '-' for stdin")
+    p_warm.add_argument("--concurrency", type=int, default=4)
+    p_warm.add_argument("--rate", type=float, default=2.0, help="Max analyses started per second")
+    p_warm.add_argument("--limit", type=int, default=0, help="Only the first N distinct IPs")
+    p_warm.add_argument("--force", action="store_true", help="Re-analyze cached IPs too")
+
+    p_export = sub.add_parser("export", help="Dump the verdict store to JSON Lines")
+    p_export.add_argument("dest", help="File path or '-' for stdout")
+    p_export.add_argument("--pattern", default=None, help="Key pattern (default: current CACHE_VERSION)")
+    p_export.add_argument("--batch", type=int, default=500)
+
+    p_import = sub.add_parser("import", help="Load a JSON Lines dump into Redis")
+    p_import.add_argument("source", help="File path or '-' for stdin")
+    p_import.add_argument("--overwrite", action="store_true")
+    p_import.add_argument("--batch", type=int, default=500)
+
+    sub.add_parser("backfill-networks", help="Rebuild network/ASN aggregates from cached verdicts")
+    sub.add_parser("migrate", help="Upgrade cached entries to the current schema (SCAN sweep)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "warm":
+        src = sys.stdin if args.source == "-" else open(args.source)
+        with src:
+            ips = extract_ips(src)
+        if args.limit:
+            ips = ips[:args.limit]
+        print(f"[WARM] {len(ips)} distinct public IPs to replay")
+        asyncio.run(warm(ips, args.concurrency, args.rate, args.force))
+
+    elif args.command == "export":
+        dest = sys.stdout if args.dest == "-" else open(args.dest, "w")
+        with dest:
+            export_entries(dest, args.pattern, args.batch)
+
+    elif args.command == "import":
+        src = sys.stdin if args.source == "-" else open(args.source)
+        with src:
+            import_entries(src, args.batch, args.overwrite)
+
+    elif args.command == "backfill-networks":
+        backfill_networks()
+
+    elif args.command == "migrate":
+        from app.cache.migrations import sweep
+        sweep()
+
+
+if __name__ == "__main__":
+    main()
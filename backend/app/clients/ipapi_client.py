@@ -12,7 +12,9 @@ async def fetch_ipapi_data(ip: str):
             return {
                 "hostname": data.get("hostname"),
                 "country": data.get("country_name"),
-                "isp": data.get("org")
+                "isp": data.get("org"),
+                "asn": data.get("asn"),
+                "network": data.get("network")
             }
     except Exception as e:
         return {"error": str(e)}
@@ -0,0 +1,31 @@
+import ipaddress
+from app.config.settings import settings
+
+# Local stand-in feed: CIDRs (one per line, '#' comments) from
+# LOCAL_BLOCKLIST_PATH. Costs nothing and answers instantly, so it is
+# useful in development and as a tie-breaker when remote feeds are slow.
+
+_networks = None
+
+
+def load_blocklist(path: str):
+    networks = []
+    with open(path) as fh:
+        for line in fh:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                networks.append(ipaddress.ip_network(line, strict=False))
+    return networks
+
+
+async def fetch_local_blocklist_data(ip: str):
+    global _networks
+    try:
+        if _networks is None:
+            _networks = load_blocklist(settings.LOCAL_BLOCKLIST_PATH)
+
+        addr = ipaddress.ip_address(ip)
+        matches = [str(n) for n in _networks if addr in n]
+        return {"listed": bool(matches), "matches": matches}
+    except Exception as e:
+        return {"error": str(e)}
@@ -0,0 +1,31 @@
+import httpx
+from app.config.settings import settings
+
+BASE_URL = "https://www.virustotal.com/api/v3/ip_addresses"
+
+async def fetch_virustotal_data(ip: str):
+    try:
+        async with httpx.AsyncClient(timeout=5) as client:
+            resp = await client.get(
+                f"{BASE_URL}/{ip}",
+                headers={
+                    "Accept": "application/json",
+                    "x-apikey": settings.VIRUSTOTAL_KEY
+                }
+            )
+            resp.raise_for_status()
+            attrs = resp.json().get("data", {}).get("attributes", {})
+            stats = attrs.get("last_analysis_stats", {})
+            return {
+                "malicious": stats.get("malicious"),
+                "suspicious": stats.get("suspicious"),
+                "harmless": stats.get("harmless"),
+                "undetected": stats.get("undetected"),
+                "reputation": attrs.get("reputation"),
+                "as_owner": attrs.get("as_owner"),
+                "asn": attrs.get("asn"),
+                "network": attrs.get("network"),
+                "country": attrs.get("country")
+            }
+    except Exception as e:
+        return {"error": str(e)}
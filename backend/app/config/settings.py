@@ -10,17 +10,88 @@ class Settings:
     IPAPI_KEY = os.getenv("IPAPI_API_KEY")
     VIRUSTOTAL_KEY = os.getenv("VIRUSTOTAL_API_KEY")
 
+    # Threat feed orchestration
+    FEED_QUORUM = float(os.getenv("FEED_QUORUM", 0.75))  # fraction of total provider weight
+    FEED_DEADLINE = float(os.getenv("FEED_DEADLINE_SECONDS", 4))
+    FEED_STRAGGLERS = os.getenv("FEED_STRAGGLERS", "background")  # background | cancel
+    FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL_SECONDS", 3600))
+    # Verdicts built while a feed was pending/failed stay fresh only this long, so the
+    # next lookup re-runs with the stragglers' answers from the per-feed cache
+    CACHE_PARTIAL_TTL = int(os.getenv("CACHE_PARTIAL_TTL_SECONDS", 600))
+    FEED_BUDGET = float(os.getenv("FEED_BUDGET", 0))  # max provider cost per analysis, 0 → unlimited
+    FEED_DISABLED = [p for p in os.getenv("FEED_DISABLED", "").split(",") if p]
+    LOCAL_BLOCKLIST_PATH = os.getenv("LOCAL_BLOCKLIST_PATH")
+
     # LLM Provider
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    LLM_STARTUP_CHECK = os.getenv("LLM_STARTUP_CHECK", "true").lower() == "true"
+
+    # Distilled local classifier (skip the LLM when confident)
+    LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
+    LOCAL_MODEL_THRESHOLD = float(os.getenv("LOCAL_MODEL_THRESHOLD", 0.9))
+
+    # Content-addressed cache for individual LLM calls
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 86400))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 100000))
 
     # Cache + Redis
     CACHE_TTL = int(os.getenv("CACHE_TTL_SECONDS", 86400))
     CACHE_VERSION = os.getenv("CACHE_VERSION", "v1") 
+    # Verdicts are kept this long past CACHE_TTL to be served stale under overload
+    CACHE_STALE_GRACE = int(os.getenv("CACHE_STALE_GRACE_SECONDS", 86400))
+    # Older namespaces still read (and moved forward) after a CACHE_VERSION bump
+    CACHE_LEGACY_VERSIONS = [v for v in os.getenv("CACHE_LEGACY_VERSIONS", "").split(",") if v]
+    CACHE_MIGRATION_SWEEP = os.getenv("CACHE_MIGRATION_SWEEP", "true").lower() == "true"
 
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
     REDIS_DB = int(os.getenv("REDIS_DB", 0))
 
+    # Workers + shared state
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))  # 0 → one worker per core
+    SINGLE_FLIGHT_TTL = int(os.getenv("SINGLE_FLIGHT_TTL_SECONDS", 120))
+    SINGLE_FLIGHT_WAIT = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", 90))
+    RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", 0))  # 0 → disabled
+
+    # Admission control / load shedding
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_GLOBAL_LIMIT = int(os.getenv("ADMISSION_GLOBAL_LIMIT", 32))
+    ADMISSION_PER_CLIENT_LIMIT = int(os.getenv("ADMISSION_PER_CLIENT_LIMIT", 4))
+    ADMISSION_INTERACTIVE_RESERVED = int(os.getenv("ADMISSION_INTERACTIVE_RESERVED", 8))
+    ADMISSION_SLOT_TTL = int(os.getenv("ADMISSION_SLOT_TTL_SECONDS", 180))
+    ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 10))
+    DEGRADE_FEED_ONLY = os.getenv("DEGRADE_FEED_ONLY", "true").lower() == "true"
+    BULK_CLIENTS = [c for c in os.getenv("BULK_CLIENTS", "").split(",") if c]
+    # Peers (IPs/CIDRs, e.g. the frontend proxy or an analyst VPN) whose X-Client-Id /
+    # X-Priority headers are honoured and whose traffic is interactive; everyone else is
+    # keyed on its address and runs at bulk priority
+    ADMISSION_TRUSTED_CLIENTS = [c for c in os.getenv("ADMISSION_TRUSTED_CLIENTS", "").split(",") if c]
+
+    # Per-request profiling + slow-request traces
+    # Shared secret for on-demand profiling (X-Profile: <token>); unset → header ignored
+    PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+    PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", 2000))
+    PROFILE_RING_SIZE = int(os.getenv("PROFILE_RING_SIZE", 200))
+    PROFILE_STACK_INTERVAL_MS = float(os.getenv("PROFILE_STACK_INTERVAL_MS", 5))  # 0 → no stack sampling
+    DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "false").lower() == "true"
+
+    # Network (CIDR / ASN) reputation
+    NETWORK_PREFIXES_V4 = [int(p) for p in os.getenv("NETWORK_PREFIXES_V4", "16,24").split(",")]
+    NETWORK_PREFIXES_V6 = [int(p) for p in os.getenv("NETWORK_PREFIXES_V6", "32,48,64").split(",")]
+    NETWORK_TTL = int(os.getenv("NETWORK_TTL_SECONDS", 7 * 86400))
+    NETWORK_MIN_SAMPLES = int(os.getenv("NETWORK_MIN_SAMPLES", 5))
+    NETWORK_VERDICT_RATIO = float(os.getenv("NETWORK_VERDICT_RATIO", 0.8))
+    NETWORK_SHORT_CIRCUIT_LEVELS = [
+        lvl for lvl in os.getenv("NETWORK_SHORT_CIRCUIT_LEVELS", "High").split(",") if lvl
+    ]
+    # Only prefixes at least this specific may short-circuit (0 → longest configured length);
+    # coarser aggregates are passed to the LLM as context only
+    NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V4 = int(os.getenv("NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V4", 0))
+    NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V6 = int(os.getenv("NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V6", 0))
+    NETWORK_MAX_SUBNETS = int(os.getenv("NETWORK_MAX_SUBNETS", 4096))
+
     def validate(self):
         missing = []
         if not self.ABUSEIPDB_KEY:
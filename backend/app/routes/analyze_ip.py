@@ -1,14 +1,32 @@
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from app.utils.ip_validator import validate_ip
 from app.services.ip_analyzer_service import analyze_ip
+from app.services.admission import OverloadedError
+from app.cache.shared_state import rate_limit_allow
+from app.config.settings import settings
 
 router = APIRouter(prefix="/api")
 
 @router.get("/analyze-ip")
-async def analyze_ip_route(ip: str = Query(...)):
+async def analyze_ip_route(request: Request, ip: str = Query(...)):
+    client_id = request.client.host if request.client else "unknown"
+    if not rate_limit_allow(client_id, settings.RATE_LIMIT_PER_MINUTE):
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": "60"}
+        )
+
     if not validate_ip(ip):
         raise HTTPException(status_code=400, detail="Invalid IP address")
 
-    result = await analyze_ip(ip)
+    try:
+        result = await analyze_ip(ip)
+    except OverloadedError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     return result
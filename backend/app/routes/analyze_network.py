@@ -0,0 +1,20 @@
+
+import ipaddress
+
+import redis
+from fastapi import APIRouter, HTTPException, Query
+from app.services.network_reputation import summarize_network
+
+router = APIRouter(prefix="/api")
+
+@router.get("/analyze-network")
+async def analyze_network_route(cidr: str = Query(...)):
+    try:
+        ipaddress.ip_network(cidr, strict=False)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid CIDR")
+
+    try:
+        return summarize_network(cidr)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=503, detail=f"Reputation store unavailable: {e}")
@@ -0,0 +1,38 @@
+
+import redis
+from fastapi import APIRouter, HTTPException, Query
+
+from app.config.settings import settings
+from app.utils.profiling import list_traces, get_trace
+
+router = APIRouter(prefix="/debug")
+
+
+def require_debug():
+    if not settings.DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get("/traces")
+async def list_traces_route(
+    limit: int = Query(50, ge=1, le=500),
+    min_ms: float = Query(0.0, ge=0),
+):
+    require_debug()
+    try:
+        return list_traces(limit=limit, min_ms=min_ms)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=503, detail=f"Trace store unavailable: {e}")
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace_route(trace_id: str):
+    require_debug()
+    try:
+        trace = get_trace(trace_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=503, detail=f"Trace store unavailable: {e}")
+
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
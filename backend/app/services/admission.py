@@ -0,0 +1,180 @@
+import ipaddress
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import redis
+
+from app.cache.redis_cache import redis_cache
+from app.cache.shared_state import incr_metric
+from app.config.settings import settings
+
+
+# Admission Control
+#
+# Only cache misses are expensive (feeds + LLM), so slots are taken right
+# before that work starts, not per HTTP request. In-flight analyses are
+# tracked in Redis sorted sets (member = slot token, score = expiry) so the
+# limits hold across worker processes and a crashed worker's slots expire
+# on their own:
+#
+#   ipintel:admission:global            → every in-flight analysis
+#   ipintel:admission:client:<client>   → one client's in-flight analyses
+#
+# Bulk traffic may only use GLOBAL_LIMIT - INTERACTIVE_RESERVED slots, so
+# analysts always have headroom. Callers cannot pick their own identity or
+# priority: clients are keyed on the peer address (like the rate limiter)
+# and run at bulk priority unless the peer is in ADMISSION_TRUSTED_CLIENTS.
+# A rejected analysis degrades in ip_analyzer_service (stale verdict →
+# feed-only result → 429).
+
+GLOBAL_KEY = "ipintel:admission:global"
+CLIENT_PREFIX = "ipintel:admission:client"
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+# Set per request by AdmissionContextMiddleware (and by the warm-up CLI)
+request_client: ContextVar[str] = ContextVar("request_client", default="internal")
+request_priority: ContextVar[str] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+class OverloadedError(Exception):
+    """
+    Raised when an analysis can neither be admitted nor served degraded.
+    Routes turn it into 429 + Retry-After.
+    """
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Slot:
+    def __init__(self, token: str, client: str, priority: str, admitted: bool, reason: Optional[str] = None):
+        self.token = token
+        self.client = client
+        self.priority = priority
+        self.admitted = admitted
+        self.reason = reason  # "client" | "global" when rejected
+
+
+class AdmissionController:
+
+    def acquire(self, client: Optional[str] = None, priority: Optional[str] = None) -> Slot:
+        client = client or request_client.get()
+        priority = priority or request_priority.get()
+        token = uuid.uuid4().hex
+
+        if not settings.ADMISSION_ENABLED:
+            return Slot(token, client, priority, admitted=True)
+
+        now = time.time()
+        expiry = now + settings.ADMISSION_SLOT_TTL
+        client_key = f"{CLIENT_PREFIX}:{client}"
+
+        try:
+            pipe = redis_cache.client.pipeline()
+            pipe.zremrangebyscore(GLOBAL_KEY, 0, now)
+            pipe.zremrangebyscore(client_key, 0, now)
+            pipe.zadd(GLOBAL_KEY, {token: expiry})
+            pipe.zadd(client_key, {token: expiry})
+            pipe.expire(client_key, settings.ADMISSION_SLOT_TTL)
+            pipe.zcard(GLOBAL_KEY)
+            pipe.zcard(client_key)
+            global_count, client_count = pipe.execute()[-2:]
+        except redis.RedisError as e:
+            print(f"[ADMISSION] Backend unavailable ({e}) → admitting")
+            return Slot(token, client, priority, admitted=True)
+
+        limit = settings.ADMISSION_GLOBAL_LIMIT
+        if priority == BULK:
+            limit -= settings.ADMISSION_INTERACTIVE_RESERVED
+
+        reason = None
+        if client_count > settings.ADMISSION_PER_CLIENT_LIMIT:
+            reason = "client"
+        elif global_count > limit:
+            reason = "global"
+
+        slot = Slot(token, client, priority, admitted=reason is None, reason=reason)
+        if reason:
+            self.release(slot)
+            incr_metric(f"admission_rejected_{reason}_{priority}")
+        else:
+            incr_metric(f"admission_admitted_{priority}")
+        return slot
+
+    def release(self, slot: Slot):
+        try:
+            pipe = redis_cache.client.pipeline(transaction=False)
+            pipe.zrem(GLOBAL_KEY, slot.token)
+            pipe.zrem(f"{CLIENT_PREFIX}:{slot.client}", slot.token)
+            pipe.execute()
+        except redis.RedisError:
+            pass  # slot expires after ADMISSION_SLOT_TTL
+
+    def in_flight(self) -> Dict[str, int]:
+        try:
+            redis_cache.client.zremrangebyscore(GLOBAL_KEY, 0, time.time())
+            return {"admission_in_flight": redis_cache.client.zcard(GLOBAL_KEY)}
+        except redis.RedisError:
+            return {}
+
+
+admission = AdmissionController()
+
+
+
+# ASGI middleware: identify the client and the request priority
+
+def is_trusted(peer: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(peer)
+    except ValueError:
+        return False
+    for network in settings.ADMISSION_TRUSTED_CLIENTS:
+        try:
+            if addr in ipaddress.ip_network(network, strict=False):
+                return True
+        except ValueError:
+            continue
+    return False
+
+
+class AdmissionContextMiddleware:
+    """
+    Untrusted peers: client id = peer address, priority = bulk (headers
+    ignored, so a scanner can neither rotate X-Client-Id around the
+    per-client limit nor claim the interactive reserve).
+
+    Trusted peers (ADMISSION_TRUSTED_CLIENTS): client id = X-Client-Id,
+    else the peer address; priority = X-Priority: bulk|interactive, else
+    bulk for BULK_CLIENTS, else interactive.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        peer = scope.get("client")
+        client = peer[0] if peer else "unknown"
+        priority = BULK
+
+        if is_trusted(client):
+            headers = {k.decode().lower(): v.decode() for k, v in scope.get("headers", [])}
+            client = headers.get("x-client-id") or client
+
+            priority = headers.get("x-priority", "").lower()
+            if priority not in (BULK, INTERACTIVE):
+                priority = BULK if client in settings.BULK_CLIENTS else INTERACTIVE
+
+        client_token = request_client.set(client)
+        priority_token = request_priority.set(priority)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_client.reset(client_token)
+            request_priority.reset(priority_token)
@@ -0,0 +1,255 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import redis
+
+from app.cache.redis_cache import redis_cache
+from app.cache.shared_state import incr_metric
+from app.config.settings import settings
+from app.utils.profiling import timed_io, event
+
+from app.clients.abuseipdb_client import fetch_abuseipdb_data
+from app.clients.ipqualityscore_client import fetch_ipqs_data
+from app.clients.ipapi_client import fetch_ipapi_data
+from app.clients.virustotal_client import fetch_virustotal_data
+from app.clients.local_blocklist_client import fetch_local_blocklist_data
+
+
+# Threat Feed Providers
+#
+# Each feed declares:
+#   cost    relative quota/price units per lookup (FEED_BUDGET caps the sum)
+#   timeout per-call limit in seconds
+#   weight  how much the feed counts towards the quorum
+#
+# gather_threat_feeds() launches the enabled feeds cheapest-first, returns
+# as soon as the feeds that answered carry FEED_QUORUM of the total weight
+# (or FEED_DEADLINE passes), and then cancels or backgrounds the rest.
+# Backgrounded answers land in a short-lived per-feed cache so the next
+# lookup of the same IP gets them for free.
+
+FEED_CACHE_PREFIX = "ipintel:feed"
+
+
+class ThreatFeedProvider:
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[str], Awaitable[Dict[str, Any]]],
+        cost: float = 1.0,
+        timeout: float = 5.0,
+        weight: float = 1.0,
+        enabled: Callable[[], bool] = lambda: True,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.cost = cost
+        self.timeout = timeout
+        self.weight = weight
+        self.enabled = enabled
+
+    def is_enabled(self) -> bool:
+        return self.name not in settings.FEED_DISABLED and self.enabled()
+
+
+PROVIDERS: Dict[str, ThreatFeedProvider] = {}
+
+
+def register_provider(provider: ThreatFeedProvider):
+    PROVIDERS[provider.name] = provider
+    return provider
+
+
+def active_providers() -> List[ThreatFeedProvider]:
+    """
+    Enabled providers, cheapest first, trimmed to FEED_BUDGET.
+    """
+    providers = sorted((p for p in PROVIDERS.values() if p.is_enabled()), key=lambda p: p.cost)
+
+    if settings.FEED_BUDGET <= 0:
+        return providers
+
+    selected, spent = [], 0.0
+    for provider in providers:
+        if spent + provider.cost > settings.FEED_BUDGET:
+            continue
+        selected.append(provider)
+        spent += provider.cost
+    return selected
+
+
+register_provider(ThreatFeedProvider(
+    "abuseipdb", fetch_abuseipdb_data, cost=1.0, timeout=5.0, weight=1.0,
+    enabled=lambda: bool(settings.ABUSEIPDB_KEY),
+))
+register_provider(ThreatFeedProvider(
+    "ipqualityscore", fetch_ipqs_data, cost=1.0, timeout=5.0, weight=1.0,
+    enabled=lambda: bool(settings.IPQS_KEY),
+))
+register_provider(ThreatFeedProvider(
+    "ipapi", fetch_ipapi_data, cost=0.2, timeout=3.0, weight=0.5,
+))
+register_provider(ThreatFeedProvider(
+    "virustotal", fetch_virustotal_data, cost=4.0, timeout=6.0, weight=1.0,
+    enabled=lambda: bool(settings.VIRUSTOTAL_KEY),
+))
+register_provider(ThreatFeedProvider(
+    "local_blocklist", fetch_local_blocklist_data, cost=0.0, timeout=0.5, weight=0.25,
+    enabled=lambda: bool(settings.LOCAL_BLOCKLIST_PATH),
+))
+
+
+
+# Per-feed cache (fed by background stragglers)
+
+def _feed_key(name: str, ip: str) -> str:
+    return f"{FEED_CACHE_PREFIX}:{name}:{ip}"
+
+
+def _is_success(data: Any) -> bool:
+    return isinstance(data, dict) and "error" not in data
+
+
+def load_cached_feeds(ip: str, names: List[str]) -> Dict[str, Dict[str, Any]]:
+    if not names:
+        return {}
+    try:
+        raws = redis_cache.client.mget([_feed_key(n, ip) for n in names])
+    except redis.RedisError:
+        return {}
+
+    feeds = {}
+    for name, raw in zip(names, raws):
+        if not raw:
+            continue
+        try:
+            feeds[name] = json.loads(raw)
+        except ValueError:
+            # Corrupt entry → drop it and refetch the feed, don't fail the lookup
+            print(f"[FEEDS] Dropping unreadable cached {name} answer for {ip}")
+            try:
+                redis_cache.client.delete(_feed_key(name, ip))
+            except redis.RedisError:
+                pass
+    return feeds
+
+
+def store_feed(name: str, ip: str, data: Dict[str, Any]):
+    if not _is_success(data):
+        return
+    try:
+        redis_cache.client.set(_feed_key(name, ip), json.dumps(data), ex=settings.FEED_CACHE_TTL)
+    except redis.RedisError:
+        pass
+
+
+# Keeps background tasks referenced until they finish
+_background = set()
+
+
+def _finish_in_background(task: asyncio.Task, name: str, ip: str):
+    def done(t: asyncio.Task):
+        _background.discard(t)
+        if t.cancelled() or t.exception() is not None:
+            return
+        store_feed(name, ip, t.result())
+        incr_metric(f"feed_{name}_late")
+
+    _background.add(task)
+    task.add_done_callback(done)
+
+
+
+# Orchestrator
+
+async def gather_threat_feeds(
+    ip: str,
+    quorum: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Query all active feeds concurrently with quorum-based early return.
+
+    Returns:
+      {
+        "data":    {provider: response},   # only feeds that answered
+        "sources": {
+          "contributed": [...],   # answered successfully (incl. cached)
+          "cached":      [...],   # served from the per-feed cache
+          "failed":      [...],   # error / timeout
+          "pending":     [...],   # still running at return time
+          "skipped":     [...],   # not queried (quorum already met from cache)
+        }
+      }
+    """
+    quorum = settings.FEED_QUORUM if quorum is None else quorum
+    deadline = settings.FEED_DEADLINE if deadline is None else deadline
+
+    providers = active_providers()
+    total_weight = sum(p.weight for p in providers) or 1.0
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    data: Dict[str, Dict[str, Any]] = {}
+    sources = {"contributed": [], "cached": [], "failed": [], "pending": [], "skipped": []}
+    weight = 0.0
+
+    cached = load_cached_feeds(ip, [p.name for p in providers])
+    for provider in providers:
+        if provider.name in cached:
+            data[provider.name] = cached[provider.name]
+            sources["contributed"].append(provider.name)
+            sources["cached"].append(provider.name)
+            weight += provider.weight
+
+    # Cached answers may already satisfy the quorum → no waiting on the network.
+    # The uncached feeds still go out as stragglers (so their answers reach the
+    # per-feed cache), or are listed as skipped when stragglers get cancelled;
+    # either way the caller sees the verdict as partial.
+    launch = [p for p in providers if p.name not in cached]
+    if weight >= quorum * total_weight and settings.FEED_STRAGGLERS == "cancel":
+        sources["skipped"] = [p.name for p in launch]
+        launch = []
+    tasks = {
+        asyncio.ensure_future(asyncio.wait_for(timed_io(f"feed:{p.name}", p.fetch(ip)), p.timeout)): p
+        for p in launch
+    }
+    pending = set(tasks)
+
+    while pending and weight < quorum * total_weight:
+        remaining = deadline - (loop.time() - started)
+        if remaining <= 0:
+            break
+
+        done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+
+        for task in done:
+            provider = tasks[task]
+            result = None if task.exception() else task.result()
+
+            if _is_success(result):
+                data[provider.name] = result
+                sources["contributed"].append(provider.name)
+                weight += provider.weight
+                store_feed(provider.name, ip, result)
+            else:
+                if result is not None:
+                    data[provider.name] = result
+                sources["failed"].append(provider.name)
+                incr_metric(f"feed_{provider.name}_failed")
+
+    for task in pending:
+        provider = tasks[task]
+        sources["pending"].append(provider.name)
+        if settings.FEED_STRAGGLERS == "cancel":
+            task.cancel()
+        else:
+            _finish_in_background(task, provider.name, ip)
+
+    incr_metric("feed_cost_total", float(sum(tasks[t].cost for t in tasks)))
+    event("feeds", **sources)
+    if sources["pending"]:
+        print(f"[FEEDS] Quorum/deadline reached for {ip} → not waiting for {sources['pending']}")
+
+    return {"data": data, "sources": sources}
@@ -1,19 +1,30 @@
 
 import asyncio
-from typing import Any, Dict
+import time
+from typing import Any, Dict, Optional
 
-from app.clients.abuseipdb_client import fetch_abuseipdb_data
-from app.clients.ipqualityscore_client import fetch_ipqs_data
-from app.clients.ipapi_client import fetch_ipapi_data
+from app.services.feed_providers import gather_threat_feeds
 
 from app.utils.normalizer import normalize_all_sources
 from app.ai.llm_risk_analyzer import generate_risk_assessment
-from app.cache.redis_cache import cache_get, cache_set, redis_cache, make_cache_key
+from app.ai.local_classifier import get_local_model, local_assessment
+from app.cache.redis_cache import cache_set, redis_cache, make_cache_key
+from app.cache.migrations import load_entry, stamp
+from app.cache.shared_state import acquire_lock, release_lock, is_locked, incr_metric
+from app.services.network_reputation import lookup_network, network_verdict, record_verdict
+from app.services.admission import admission, BULK, OverloadedError
+from app.config.settings import settings
 from app.utils.error_handlers import ensure_minimal_response
+from app.utils.profiling import stage, event
 
+# Provider namespace used for cache keys (reads and writes must agree)
+CACHE_MODEL = "openai"
 
 
-# Cache Validation — Prevent Serving Old/Invalid Gemini Outputs
+
+# Cache Validation — structural check on (already migrated) entries.
+# Retired-model entries (Gemini, null model) are handled by the schema
+# upgrades in app/cache/migrations.py, not here.
 
 def is_cached_entry_valid(entry: dict) -> bool:
     """
@@ -31,13 +42,7 @@ def is_cached_entry_valid(entry: dict) -> bool:
     if entry["risk_level"] not in ("Low", "Medium", "High"):
         return False
 
-    # If model_used contains Gemini, reject it.
-    model = str(entry["model_used"]).lower()
-    if "gemini" in model or model == "none" or model == "null":
-        return False
-
-    # Remove old Gemini error text
-    if "gemini" in entry["risk_analysis"].lower():
+    if not entry["model_used"]:
         return False
 
     conf = entry.get("confidence")
@@ -53,35 +58,209 @@ def is_cached_entry_valid(entry: dict) -> bool:
 
 
 
+# Cache Read
+
+def is_fresh(entry: dict) -> bool:
+    """
+    Verdicts live fresh_for + CACHE_STALE_GRACE in Redis; past fresh_for
+    (CACHE_TTL, or CACHE_PARTIAL_TTL for partial-quorum verdicts) they
+    only serve as stale fallbacks under overload.
+    """
+    cached_at = entry.get("cached_at")
+    fresh_for = entry.get("fresh_for", settings.CACHE_TTL)
+    return cached_at is None or time.time() - cached_at <= fresh_for
+
+
+def get_valid_cached(ip: str, allow_stale: bool = False):
+    """
+    Return a valid cached verdict for `ip`, deleting corrupt entries.
+    Entries on an older schema are upgraded on read (see migrations.py).
+    """
+    cached = load_entry(ip, model=CACHE_MODEL)
+
+    if cached is None:
+        return None
+
+    print(f"[CACHE] Found cached entry for {ip}")
+
+    if is_cached_entry_valid(cached):
+        if not allow_stale and not is_fresh(cached):
+            print(f"[CACHE] STALE cache for {ip} → recomputing")
+            return None
+        print(f"[CACHE] VALID cache → Using cached result for {ip}")
+        return cached
+
+    print(f"[CACHE] INVALID cache for {ip} → deleting")
+    redis_cache.delete(make_cache_key(ip, CACHE_MODEL))
+    return None
+
+
+
+# Single-Flight — one worker computes, the others wait for its cache write
+
+async def wait_for_inflight(ip: str):
+    """
+    Poll the cache while another worker holds the analysis lock for `ip`.
+    Returns the verdict once published, or None if the owner gave up
+    (lock released/expired without a cache write) or we hit the wait limit.
+    """
+    deadline = asyncio.get_running_loop().time() + settings.SINGLE_FLIGHT_WAIT
+    delay = 0.05
+
+    while asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+        cached = get_valid_cached(ip)
+        if cached is not None:
+            return cached
+
+        if not is_locked(f"analyze:{ip}"):
+            return get_valid_cached(ip)
+
+    return None
+
+
+
 # MAIN PIPELINE
 
 
 async def analyze_ip(ip: str) -> Dict[str, Any]:
 
+    incr_metric("requests_total")
+
 
     # 1. VERSIONED CACHE CHECK
 
-    cached = cache_get(ip, model="openai")
+    with stage("cache_lookup"):
+        cached = get_valid_cached(ip)
 
     if cached is not None:
-        print(f"[CACHE] Found cached entry for {ip}")
+        incr_metric("cache_hits")
+        event("cache_hit")
+        return cached
+
+    incr_metric("cache_misses")
+    event("cache_miss")
+
+
+    # 1b. SINGLE-FLIGHT (shared across worker processes via Redis)
+
+    lock_name = f"analyze:{ip}"
+    token = acquire_lock(lock_name, settings.SINGLE_FLIGHT_TTL)
+
+    if token is None:
+        print(f"[SINGLE-FLIGHT] Analysis for {ip} already in flight → waiting")
+        incr_metric("single_flight_waits")
+
+        with stage("single_flight_wait"):
+            shared = await wait_for_inflight(ip)
+        if shared is not None:
+            return shared
+
+        token = acquire_lock(lock_name, settings.SINGLE_FLIGHT_TTL)
+
+    try:
+        return await _analyze_uncached(ip)
+    finally:
+        if token is not None:
+            release_lock(lock_name, token)
+
+
+
+# Degraded Results (admission rejected)
+
+def degraded_assessment(normalized: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Feed-only verdict without the LLM: the local classifier at any
+    confidence if one is loaded, else a score heuristic.
+    """
+    local_model = get_local_model()
+    if local_model is not None:
+        level, conf = local_model.predict(normalized)
+        return {**local_assessment(level, conf), "degraded": "feed_only"}
+
+    scores = [
+        normalized.get("abuse_score"),
+        normalized.get("fraud_score"),
+        (normalized.get("vt_malicious") or 0) * 10,
+    ]
+    peak = max((s for s in scores if isinstance(s, (int, float)) and not isinstance(s, bool)), default=0)
+    level = "High" if peak >= 75 else "Medium" if peak >= 40 else "Low"
+
+    return {
+        "risk_level": level,
+        "risk_analysis": (
+            f"Service under load — verdict derived from threat-feed scores only "
+            f"(peak indicator {peak:.0f}/100), without AI analysis."
+        ),
+        "recommendations": ["Re-run the analysis later for a full AI assessment"],
+        "confidence": 0.5,
+        "model_used": "feed-heuristic",
+        "degraded": "feed_only",
+    }
 
-        if is_cached_entry_valid(cached):
-            print(f"[CACHE] VALID cache → Using cached result for {ip}")
-            return cached
 
-        print(f"[CACHE] INVALID cache for {ip} → deleting")
-        redis_cache.delete(make_cache_key(ip, "openai"))
 
+async def _analyze_uncached(ip: str) -> Dict[str, Any]:
+
+    # 1c. NETWORK REPUTATION (longest-prefix match over aggregated verdicts)
+
+    with stage("network_lookup"):
+        network_reputation = lookup_network(ip)
+
+    if network_reputation is not None:
+        inferred = network_verdict(ip, network_reputation)
+        if inferred is not None:
+            print(f"[NETWORK] {ip} matched {network_reputation['prefix']} → {inferred['risk_level']}")
+            incr_metric("network_short_circuits")
+            return inferred
+
+
+    # 1d. ADMISSION CONTROL (see services/admission.py)
+
+    with stage("admission"):
+        slot = admission.acquire()
+
+    event("admission", admitted=slot.admitted, reason=slot.reason, priority=slot.priority)
+
+    if not slot.admitted:
+        print(f"[ADMISSION] {ip} rejected ({slot.reason}, {slot.priority}) → degrading")
+
+        stale = get_valid_cached(ip, allow_stale=True)
+        if stale is not None:
+            incr_metric("degraded_stale")
+            return {**stale, "degraded": "stale"}
+
+        if slot.reason == "client" or slot.priority == BULK or not settings.DEGRADE_FEED_ONLY:
+            incr_metric("degraded_rejected")
+            raise OverloadedError(
+                f"Analysis capacity exhausted ({slot.reason} limit)",
+                retry_after=settings.ADMISSION_RETRY_AFTER,
+            )
+
+        incr_metric("degraded_feed_only")
+
+    try:
+        return await _run_pipeline(ip, network_reputation, use_llm=slot.admitted)
+    finally:
+        if slot.admitted:
+            admission.release(slot)
+
+
+
+async def _run_pipeline(
+    ip: str,
+    network_reputation: Optional[Dict[str, Any]],
+    use_llm: bool = True,
+) -> Dict[str, Any]:
 
     # 2. EXTERNAL API LOOKUP
 
+    # Provider registry with quorum/deadline early return (feed_providers.py)
     try:
-        abuse_data, ipqs_data, geo_data = await asyncio.gather(
-            fetch_abuseipdb_data(ip),
-            fetch_ipqs_data(ip),
-            fetch_ipapi_data(ip),
-        )
+        with stage("feeds"):
+            feeds = await gather_threat_feeds(ip)
     except Exception as e:
         print("[ERROR] External API Failure:", e)
 
@@ -98,21 +277,43 @@ async def analyze_ip(ip: str) -> Dict[str, Any]:
         }
 
 
+    data, sources = feeds["data"], feeds["sources"]
+
+    def feed(name):
+        if name in data:
+            return data[name]
+        if name in sources["pending"]:
+            return {"error": "Not used (quorum/deadline reached before response)"}
+        if name in sources.get("skipped", []):
+            return {"error": "Not used (quorum met from cached feeds)"}
+        return {"error": "Feed not enabled"}
+
+    abuse_data = feed("abuseipdb")
+    ipqs_data = feed("ipqualityscore")
+    geo_data = feed("ipapi")
+    vt_data = data.get("virustotal")
+    local_data = data.get("local_blocklist")
+
+
     # 3. ALL EXTERNAL APIs FAILED?
 
-    all_failed = (
-        isinstance(abuse_data, dict) and "error" in abuse_data and
-        isinstance(ipqs_data, dict) and "error" in ipqs_data and
-        isinstance(geo_data, dict) and "error" in geo_data
-    )
+    all_failed = not sources["contributed"]
 
     if all_failed:
         print("[WARN] ALL external threat feeds failed.")
 
         minimal = ensure_minimal_response(ip, abuse_data, ipqs_data, geo_data)
+        minimal["sources"] = sources
+
+        if not use_llm:
+            raise OverloadedError(
+                "Analysis capacity exhausted and threat feeds unavailable",
+                retry_after=settings.ADMISSION_RETRY_AFTER,
+            )
 
         try:
-            ai_result = await generate_risk_assessment(minimal)
+            with stage("llm", minimal=True):
+                ai_result = await generate_risk_assessment(minimal)
         except Exception as e:
             print("[LLM ERROR]", e)
             ai_result = {
@@ -128,7 +329,12 @@ async def analyze_ip(ip: str) -> Dict[str, Any]:
 
     # 4. NORMALIZE
 
-    normalized = normalize_all_sources(ip, abuse_data, ipqs_data, geo_data)
+    with stage("normalize"):
+        normalized = normalize_all_sources(ip, abuse_data, ipqs_data, geo_data, vt_data)
+
+    if local_data is not None:
+        normalized["local_blocklist"] = local_data
+        normalized["raw_sources"]["local_blocklist"] = local_data
 
 
     # 5. BUILD DATASET FOR LLM
@@ -139,24 +345,54 @@ async def analyze_ip(ip: str) -> Dict[str, Any]:
             "abuseipdb": abuse_data,
             "ipqualityscore": ipqs_data,
             "ipapi": geo_data
-        }
+        },
+        "sources": sources
     }
 
+    if vt_data is not None:
+        full_dataset["raw_sources"]["virustotal"] = vt_data
 
-    # 6. RUN OPENAI LLM
+    if network_reputation is not None:
+        full_dataset["network_reputation"] = network_reputation
+
+
+    # 6a. LOCAL CLASSIFIER (distilled from cached LLM verdicts)
+
+    ai_result = None
+    local_model = get_local_model()
+
+    if not use_llm:
+        ai_result = degraded_assessment(normalized)
+
+    elif local_model is not None:
+        with stage("local_model"):
+            local_level, local_conf = local_model.predict(normalized)
+        event("local_model", risk_level=local_level, confidence=round(local_conf, 4))
+        if local_conf >= settings.LOCAL_MODEL_THRESHOLD:
+            print(f"[LOCAL MODEL] {ip} → {local_level} ({local_conf:.2f}) → skipping LLM")
+            incr_metric("local_model_decisions")
+            ai_result = local_assessment(local_level, local_conf)
+        else:
+            incr_metric("local_model_deferrals")
 
-    try:
-        print("[LLM] Running OpenAI risk assessment…")
-        ai_result = await generate_risk_assessment(full_dataset)
-    except Exception as e:
-        print("[LLM ERROR] OpenAI exception:", e)
-        ai_result = {
-            "risk_level": "unknown",
-            "risk_analysis": "AI model failed.",
-            "recommendations": [],
-            "confidence": 0.0,
-            "model_used": None,
-        }
+
+    # 6b. RUN OPENAI LLM
+
+    if ai_result is None:
+        try:
+            print("[LLM] Running OpenAI risk assessment…")
+            incr_metric("llm_runs")
+            with stage("llm"):
+                ai_result = await generate_risk_assessment(full_dataset)
+        except Exception as e:
+            print("[LLM ERROR] OpenAI exception:", e)
+            ai_result = {
+                "risk_level": "unknown",
+                "risk_analysis": "AI model failed.",
+                "recommendations": [],
+                "confidence": 0.0,
+                "model_used": None,
+            }
 
 
     # 7. MERGE FINAL RESULT
@@ -164,16 +400,27 @@ async def analyze_ip(ip: str) -> Dict[str, Any]:
     final_result: Dict[str, Any] = {
         **normalized,
         **ai_result,
+        "sources": sources,
         "full_input_to_llm": full_dataset,
     }
 
 
     # 8. STORE TO VERSIONED CACHE IF VALID
 
-    model_name = final_result.get("model_used", "openai")
-
-    if final_result["risk_level"] != "unknown":
-        cache_set(ip, final_result, model=model_name)
+    if final_result.get("degraded"):
+        print(f"[CACHE] Not storing degraded result for {ip}")
+    elif final_result["risk_level"] != "unknown":
+        # Feeds still pending/failed/skipped → short freshness, so a later
+        # lookup picks up the stragglers from the per-feed cache (FEED_CACHE_TTL)
+        partial = bool(sources["pending"] or sources["failed"] or sources.get("skipped"))
+        fresh_for = settings.CACHE_PARTIAL_TTL if partial else settings.CACHE_TTL
+
+        with stage("cache_store", partial=partial):
+            cache_set(
+                ip, stamp({**final_result, "fresh_for": fresh_for}), model=CACHE_MODEL,
+                ttl=fresh_for + settings.CACHE_STALE_GRACE
+            )
+            record_verdict(final_result)
         print(f"[CACHE] Stored valid result for {ip}")
     else:
         print(f"[CACHE] Not storing fallback result for {ip}")
@@ -0,0 +1,352 @@
+import ipaddress
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import redis
+
+from app.cache.redis_cache import redis_cache
+from app.config.settings import settings
+
+
+# Aggregated reputation per network prefix and per ASN.
+#
+# Every stored verdict is folded into counters for each configured prefix
+# length (e.g. /16 and /24 for IPv4) plus the network reported by ipapi.
+# Per-IP contributions are remembered in a "members" hash on the longest
+# configured prefix so re-analysing an IP replaces its old vote instead of
+# counting it twice.
+#
+# Keys:
+#   ipintel:net:<prefix>            → counters for one prefix
+#   ipintel:net:members:<leaf>      → ip → "level|abuse|fraud"
+#   ipintel:net:lengths:<4|6>       → extra prefix lengths seen from ipapi
+#   ipintel:asn:<asn>               → counters for one ASN
+
+NET_PREFIX = "ipintel:net"
+ASN_PREFIX = "ipintel:asn"
+
+LEVELS = ("High", "Medium", "Low")
+RECORD_ATTEMPTS = 5
+
+
+# Prefix helpers
+
+def configured_lengths(version: int) -> List[int]:
+    return settings.NETWORK_PREFIXES_V4 if version == 4 else settings.NETWORK_PREFIXES_V6
+
+
+def short_circuit_min_prefix(version: int) -> int:
+    configured = (
+        settings.NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V4 if version == 4
+        else settings.NETWORK_SHORT_CIRCUIT_MIN_PREFIX_V6
+    )
+    return configured or max(configured_lengths(version))
+
+
+def known_lengths(version: int) -> List[int]:
+    """
+    Configured prefix lengths plus any lengths learned from ipapi networks,
+    longest first (the order a longest-prefix match must probe them in).
+    """
+    lengths = set(configured_lengths(version))
+    try:
+        lengths.update(int(l) for l in redis_cache.client.smembers(f"{NET_PREFIX}:lengths:{version}"))
+    except redis.RedisError:
+        pass
+    return sorted(lengths, reverse=True)
+
+
+def prefixes_for(ip: str, lengths: Iterable[int]) -> List[str]:
+    addr = ipaddress.ip_address(ip)
+    return [str(ipaddress.ip_network(f"{addr}/{length}", strict=False)) for length in lengths]
+
+
+def parse_network(
+    network: Optional[str], ip: str
+) -> Optional[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    """
+    Validate the ipapi-reported network: must parse and contain `ip`.
+    """
+    if not network:
+        return None
+    try:
+        net = ipaddress.ip_network(network, strict=False)
+    except ValueError:
+        return None
+    return net if ipaddress.ip_address(ip) in net else None
+
+
+def _to_number(value) -> Optional[float]:
+    if isinstance(value, bool) or value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_vote(risk_level: str, abuse_score, fraud_score) -> str:
+    abuse = _to_number(abuse_score)
+    fraud = _to_number(fraud_score)
+    return f"{risk_level}|{'' if abuse is None else abuse}|{'' if fraud is None else fraud}"
+
+
+def decode_vote(vote: str):
+    level, abuse, fraud = vote.split("|")
+    return level, (float(abuse) if abuse else None), (float(fraud) if fraud else None)
+
+
+def _apply_vote(pipe, key: str, vote: str, sign: int):
+    level, abuse, fraud = decode_vote(vote)
+    pipe.hincrby(key, "count", sign)
+    pipe.hincrby(key, level.lower(), sign)
+    if abuse is not None:
+        pipe.hincrbyfloat(key, "abuse_sum", sign * abuse)
+        pipe.hincrby(key, "abuse_n", sign)
+    if fraud is not None:
+        pipe.hincrbyfloat(key, "fraud_sum", sign * fraud)
+        pipe.hincrby(key, "fraud_n", sign)
+
+
+
+# Write Path
+
+def record_verdict(result: Dict[str, Any]):
+    """
+    Fold a final verdict (normalized fields + risk_level) into the prefix
+    and ASN aggregates.
+    """
+    ip = result.get("ip")
+    risk_level = result.get("risk_level")
+    if not ip or risk_level not in LEVELS:
+        return
+
+    version = ipaddress.ip_address(ip).version
+    lengths = configured_lengths(version)
+    prefixes = prefixes_for(ip, lengths)
+
+    reported = parse_network(result.get("network"), ip)
+    if reported is not None and str(reported) not in prefixes:
+        prefixes.append(str(reported))
+
+    asn = result.get("asn")
+    vote = encode_vote(risk_level, result.get("abuse_score"), result.get("fraud_score"))
+    members_key = f"{NET_PREFIX}:members:{prefixes_for(ip, [max(lengths)])[0]}"
+
+    keys = [f"{NET_PREFIX}:{p}" for p in prefixes]
+    if asn:
+        keys.append(f"{ASN_PREFIX}:{asn}")
+
+    try:
+        with redis_cache.client.pipeline() as pipe:
+            for _ in range(RECORD_ATTEMPTS):
+                try:
+                    # WATCH the members hash: a concurrent writer for this
+                    # prefix aborts the MULTI, so the previous vote is re-read
+                    # instead of being replaced (and counted) twice
+                    pipe.watch(members_key)
+                    previous = pipe.hget(members_key, ip)
+
+                    pipe.multi()
+                    if previous != vote:
+                        pipe.hset(members_key, ip, vote)
+                        for key in keys:
+                            if previous:
+                                _apply_vote(pipe, key, previous, -1)
+                            _apply_vote(pipe, key, vote, +1)
+
+                    # Unchanged votes still count as activity → keep the aggregate alive
+                    pipe.expire(members_key, settings.NETWORK_TTL)
+                    for key in keys:
+                        pipe.hset(key, "updated_at", int(time.time()))
+                        if asn and not key.startswith(ASN_PREFIX):
+                            pipe.hset(key, "asn", asn)
+                        pipe.expire(key, settings.NETWORK_TTL)
+
+                    if reported is not None and reported.prefixlen not in lengths:
+                        pipe.sadd(f"{NET_PREFIX}:lengths:{version}", reported.prefixlen)
+
+                    pipe.execute()
+                    return
+                except redis.WatchError:
+                    pipe.reset()
+        print(f"[NETWORK] Gave up recording verdict for {ip} after {RECORD_ATTEMPTS} conflicting writes")
+    except redis.RedisError as e:
+        print(f"[NETWORK] Failed to record verdict for {ip}: {e}")
+
+
+
+# Read Path
+
+def summarize(raw: Dict[str, str], label: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Turn a counters hash into a reputation summary.
+    """
+    samples = int(float(raw.get("count", 0) or 0))
+    if samples <= 0:
+        return None
+
+    distribution = {lvl: int(float(raw.get(lvl.lower(), 0) or 0)) for lvl in LEVELS}
+    dominant = max(LEVELS, key=lambda lvl: distribution[lvl])
+    ratio = distribution[dominant] / samples
+
+    def avg(total, n):
+        n = int(float(raw.get(n, 0) or 0))
+        return round(float(raw.get(total, 0)) / n, 2) if n else None
+
+    return {
+        **label,
+        "samples": samples,
+        "risk_distribution": distribution,
+        "dominant_risk": dominant,
+        "dominant_ratio": round(ratio, 3),
+        "verdict": dominant if ratio >= settings.NETWORK_VERDICT_RATIO else "Mixed",
+        "avg_abuse_score": avg("abuse_sum", "abuse_n"),
+        "avg_fraud_score": avg("fraud_sum", "fraud_n"),
+        "asn": raw.get("asn"),
+        "updated_at": int(float(raw["updated_at"])) if raw.get("updated_at") else None,
+    }
+
+
+def merge_counters(hashes: Iterable[Dict[str, str]]) -> Dict[str, str]:
+    merged: Dict[str, float] = {}
+    asns = set()
+    for raw in hashes:
+        for field, value in raw.items():
+            if field == "asn":
+                asns.add(value)
+            elif field == "updated_at":
+                merged[field] = max(merged.get(field, 0), float(value))
+            else:
+                merged[field] = merged.get(field, 0) + float(value)
+    result = {k: str(v) for k, v in merged.items()}
+    if len(asns) == 1:
+        result["asn"] = asns.pop()
+    return result
+
+
+def lookup_network(ip: str, min_samples: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Longest-prefix match: probe every known prefix length for `ip` (longest
+    first, one pipelined round-trip) and return the most specific aggregate
+    with at least `min_samples` verdicts.
+    """
+    min_samples = settings.NETWORK_MIN_SAMPLES if min_samples is None else min_samples
+    version = ipaddress.ip_address(ip).version
+    prefixes = prefixes_for(ip, known_lengths(version))
+
+    try:
+        pipe = redis_cache.client.pipeline(transaction=False)
+        for prefix in prefixes:
+            pipe.hgetall(f"{NET_PREFIX}:{prefix}")
+        hashes = pipe.execute()
+    except redis.RedisError as e:
+        print(f"[NETWORK] Prefix lookup failed for {ip}: {e}")
+        return None
+
+    for prefix, raw in zip(prefixes, hashes):
+        summary = summarize(raw, {"prefix": prefix})
+        if summary and summary["samples"] >= min_samples:
+            return summary
+
+    return None
+
+
+def lookup_asn(asn: str) -> Optional[Dict[str, Any]]:
+    try:
+        raw = redis_cache.client.hgetall(f"{ASN_PREFIX}:{asn}")
+    except redis.RedisError:
+        return None
+    return summarize(raw, {"asn": asn})
+
+
+def summarize_network(cidr: str) -> Dict[str, Any]:
+    """
+    Reputation summary for an arbitrary prefix, from aggregates only
+    (never triggers per-IP feed lookups).
+
+    Resolution order:
+      1. exact aggregate for the prefix
+      2. merge of the aggregates one known length below it (e.g. a /20 from
+         its sixteen /24s), if that fan-out stays under NETWORK_MAX_SUBNETS
+      3. the most specific covering aggregate (e.g. a /28 answered by its /24)
+    """
+    net = ipaddress.ip_network(cidr, strict=False)
+    lengths = known_lengths(net.version)
+    client = redis_cache.client
+
+    exact = summarize(client.hgetall(f"{NET_PREFIX}:{net}"), {"prefix": str(net)})
+    if exact:
+        summary = {"cidr": str(net), "source": "exact", **exact}
+
+    else:
+        summary = None
+        longer = sorted(l for l in lengths if l > net.prefixlen)
+        for length in longer:
+            if 2 ** (length - net.prefixlen) > settings.NETWORK_MAX_SUBNETS:
+                break
+            pipe = client.pipeline(transaction=False)
+            subnets = [str(s) for s in net.subnets(new_prefix=length)]
+            for subnet in subnets:
+                pipe.hgetall(f"{NET_PREFIX}:{subnet}")
+            hashes = [h for h in pipe.execute() if h]
+            if hashes:
+                merged = summarize(merge_counters(hashes), {"prefix": str(net)})
+                summary = {
+                    "cidr": str(net),
+                    "source": "subnets",
+                    "subnet_length": length,
+                    "subnets_with_data": len(hashes),
+                    **merged,
+                }
+                break
+
+        if summary is None:
+            shorter = [l for l in lengths if l < net.prefixlen]
+            for prefix in prefixes_for(str(net.network_address), shorter):
+                covering = summarize(client.hgetall(f"{NET_PREFIX}:{prefix}"), {"prefix": prefix})
+                if covering:
+                    summary = {"cidr": str(net), "source": "covering", **covering}
+                    break
+
+    if summary is None:
+        return {"cidr": str(net), "source": "none", "samples": 0}
+
+    if summary.get("asn"):
+        summary["asn_reputation"] = lookup_asn(summary["asn"])
+
+    return summary
+
+
+
+# Verdicts inferred from network reputation
+
+def network_verdict(ip: str, reputation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Build a verdict from a conclusive prefix aggregate, or None when the
+    aggregate is mixed, its level is not allowed to short-circuit, or the
+    prefix is coarser than the short-circuit minimum (a handful of bad /24s
+    must not condemn a whole /16 — inferred verdicts are never recorded, so
+    the aggregate could not correct itself).
+    """
+    level = reputation.get("verdict")
+    if level not in settings.NETWORK_SHORT_CIRCUIT_LEVELS:
+        return None
+
+    prefix = ipaddress.ip_network(reputation["prefix"])
+    if prefix.prefixlen < short_circuit_min_prefix(prefix.version):
+        return None
+
+    return {
+        "ip": ip,
+        "risk_level": level,
+        "risk_analysis": (
+            f"Inferred from network reputation of {reputation['prefix']}: "
+            f"{reputation['risk_distribution'][level]} of {reputation['samples']} "
+            f"analyzed addresses were rated {level}."
+        ),
+        "recommendations": [f"Treat traffic from {reputation['prefix']} as {level} risk"],
+        "confidence": reputation["dominant_ratio"],
+        "model_used": "network-reputation",
+        "network_reputation": reputation,
+    }
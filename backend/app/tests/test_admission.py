@@ -0,0 +1,154 @@
+import asyncio
+import time
+import uuid
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache.redis_cache import redis_cache, make_cache_key, cache_set
+from app.cache.migrations import stamp
+from app.config.settings import settings
+from app.services.admission import (
+    admission, AdmissionContextMiddleware, GLOBAL_KEY, BULK, INTERACTIVE,
+    request_client, request_priority,
+)
+from app.services.ip_analyzer_service import analyze_ip
+from main import app
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    redis_cache.client.delete(GLOBAL_KEY)
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings, "ADMISSION_GLOBAL_LIMIT", 3)
+    monkeypatch.setattr(settings, "ADMISSION_PER_CLIENT_LIMIT", 2)
+    monkeypatch.setattr(settings, "ADMISSION_INTERACTIVE_RESERVED", 1)
+    yield
+    redis_cache.client.delete(GLOBAL_KEY)
+
+
+def test_per_client_limit(limits):
+    client = f"test-{uuid.uuid4().hex}"
+
+    slots = [admission.acquire(client, INTERACTIVE) for _ in range(3)]
+
+    assert [s.admitted for s in slots] == [True, True, False]
+    assert slots[2].reason == "client"
+
+    # Released slots free capacity again
+    admission.release(slots[0])
+    assert admission.acquire(client, INTERACTIVE).admitted
+
+
+def test_bulk_leaves_headroom_for_interactive(limits):
+    bulk = [admission.acquire(f"bulk-{uuid.uuid4().hex}", BULK) for _ in range(3)]
+
+    assert [s.admitted for s in bulk] == [True, True, False]
+    assert bulk[2].reason == "global"
+
+    interactive = admission.acquire(f"user-{uuid.uuid4().hex}", INTERACTIVE)
+    assert interactive.admitted
+
+
+def test_expired_slots_are_reclaimed(limits):
+    redis_cache.client.zadd(GLOBAL_KEY, {f"crashed-{i}": time.time() - 1 for i in range(5)})
+
+    assert admission.acquire(f"user-{uuid.uuid4().hex}", INTERACTIVE).admitted
+
+
+def _middleware_context(peer, headers):
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append((request_client.get(), request_priority.get()))
+
+    scope = {"type": "http", "headers": headers, "client": (peer, 1234)}
+    asyncio.run(AdmissionContextMiddleware(inner)(scope, None, None))
+    return seen[0]
+
+
+def test_trusted_peer_headers_set_client_and_priority(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_TRUSTED_CLIENTS", ["10.0.0.0/8"])
+    monkeypatch.setattr(settings, "BULK_CLIENTS", ["batch-job"])
+
+    assert _middleware_context("10.0.0.1", []) == ("10.0.0.1", INTERACTIVE)
+    assert _middleware_context("10.0.0.1", [(b"x-client-id", b"batch-job")]) == ("batch-job", BULK)
+    assert _middleware_context(
+        "10.0.0.1", [(b"x-client-id", b"analyst"), (b"x-priority", b"bulk")]
+    ) == ("analyst", BULK)
+
+
+def test_untrusted_peer_cannot_pick_identity_or_priority(monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_TRUSTED_CLIENTS", ["10.0.0.0/8"])
+
+    headers = [(b"x-client-id", b"spoofed"), (b"x-priority", b"interactive")]
+    assert _middleware_context("203.0.113.7", headers) == ("203.0.113.7", BULK)
+    assert _middleware_context("testclient", headers) == ("testclient", BULK)
+
+
+def _fill_global():
+    redis_cache.client.zadd(GLOBAL_KEY, {f"busy-{i}": time.time() + 60 for i in range(10)})
+
+
+async def _feeds(ip):
+    return {
+        "data": {"abuseipdb": {"abuseConfidenceScore": 90, "totalReports": 40}},
+        "sources": {"contributed": ["abuseipdb"], "cached": [], "failed": [], "pending": []}
+    }
+
+
+async def _no_llm(*args, **kwargs):
+    raise AssertionError("LLM must not run when degraded")
+
+
+@pytest.mark.asyncio
+async def test_rejected_interactive_gets_feed_only_result(limits):
+    ip = "9.9.8.7"
+    redis_cache.delete(make_cache_key(ip, "openai"))
+    _fill_global()
+
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=_no_llm):
+        result = await analyze_ip(ip)
+
+    assert result["degraded"] == "feed_only"
+    assert result["risk_level"] == "High"
+    assert redis_cache.get(make_cache_key(ip, "openai")) is None
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_prefers_stale_verdict(limits):
+    ip = "9.9.8.6"
+    entry = stamp({
+        "risk_level": "Medium", "risk_analysis": "old", "recommendations": [],
+        "confidence": 0.7, "model_used": "gpt-4.1-mini",
+    })
+    entry["cached_at"] -= settings.CACHE_TTL + 60
+    cache_set(ip, entry, model="openai", ttl=600)
+    _fill_global()
+
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=_no_llm):
+        result = await analyze_ip(ip)
+
+    redis_cache.delete(make_cache_key(ip, "openai"))
+
+    assert result["degraded"] == "stale"
+    assert result["risk_level"] == "Medium"
+
+
+def test_rejected_bulk_request_returns_429(limits, monkeypatch):
+    ip = "9.9.8.5"
+    redis_cache.delete(make_cache_key(ip, "openai"))
+    _fill_global()
+    # From a trusted peer, so X-Priority is honoured (an interactive request would degrade)
+    monkeypatch.setattr(settings, "ADMISSION_TRUSTED_CLIENTS", ["10.0.0.0/8"])
+
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=_no_llm):
+        proxy = TestClient(app, client=("10.0.0.9", 50000))
+        resp = proxy.get(f"/api/analyze-ip?ip={ip}", headers={"X-Priority": "bulk"})
+
+    assert resp.status_code == 429
+    assert resp.headers["Retry-After"] == str(settings.ADMISSION_RETRY_AFTER)
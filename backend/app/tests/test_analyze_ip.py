@@ -27,3 +27,91 @@ async def test_analyze_ip_success():
     assert resp.status_code == 200
     assert data["risk_level"] == "Low"
     assert "raw_sources" in data
+
+
+@pytest.mark.asyncio
+async def test_single_flight_runs_llm_once():
+    import asyncio
+    from app.cache.redis_cache import redis_cache, make_cache_key
+    from app.services.ip_analyzer_service import analyze_ip
+
+    ip = "9.9.9.9"
+    redis_cache.delete(make_cache_key(ip, "openai"))
+    calls = []
+
+    async def mock_feeds(ip):
+        return {
+            "data": {"ipapi": {"country": "US"}},
+            "sources": {"contributed": ["ipapi"], "cached": [], "failed": [], "pending": []}
+        }
+
+    async def slow_llm(*args, **kwargs):
+        calls.append(1)
+        await asyncio.sleep(0.3)
+        return {
+            "risk_level": "Low",
+            "risk_analysis": "Clean",
+            "recommendations": [],
+            "confidence": 0.7,
+            "model_used": "gpt-4.1-mini"
+        }
+
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=mock_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=slow_llm):
+        first, second = await asyncio.gather(analyze_ip(ip), analyze_ip(ip))
+
+    redis_cache.delete(make_cache_key(ip, "openai"))
+
+    assert len(calls) == 1
+    assert first["risk_level"] == second["risk_level"] == "Low"
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("missing", [
+    {"failed": [], "pending": ["abuseipdb"]},
+    # Quorum met from the per-feed cache, stragglers cancelled
+    {"failed": [], "pending": [], "skipped": ["abuseipdb"]},
+])
+async def test_partial_quorum_verdict_gets_short_freshness(missing):
+    import time
+    from app.cache.redis_cache import redis_cache, make_cache_key
+    from app.config.settings import settings
+    from app.services.ip_analyzer_service import analyze_ip, get_valid_cached
+
+    ip = "9.9.6.1"
+    key = make_cache_key(ip, "openai")
+    redis_cache.delete(key)
+
+    async def partial_feeds(ip):
+        return {
+            "data": {"ipapi": {"country": "US"}},
+            "sources": {"contributed": ["ipapi"], "cached": [], **missing}
+        }
+
+    async def mock_llm(*args, **kwargs):
+        return {
+            "risk_level": "Low",
+            "risk_analysis": "Clean",
+            "recommendations": [],
+            "confidence": 0.7,
+            "model_used": "gpt-4.1-mini"
+        }
+
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=partial_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=mock_llm):
+        await analyze_ip(ip)
+
+    try:
+        stored = redis_cache.get(key)
+        assert stored["fresh_for"] == settings.CACHE_PARTIAL_TTL
+        assert redis_cache.client.ttl(key) <= settings.CACHE_PARTIAL_TTL + settings.CACHE_STALE_GRACE
+        assert get_valid_cached(ip) is not None
+
+        # Past the partial window it is only a stale fallback
+        with patch("app.services.ip_analyzer_service.time.time",
+                   return_value=time.time() + settings.CACHE_PARTIAL_TTL + 1):
+            assert get_valid_cached(ip) is None
+            assert get_valid_cached(ip, allow_stale=True) is not None
+    finally:
+        redis_cache.delete(key)
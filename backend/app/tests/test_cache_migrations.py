@@ -0,0 +1,80 @@
+import json
+
+from app.cache.migrations import (
+    CACHE_SCHEMA_VERSION, migrate_entry, load_entry, stamp, sweep, run_sweep_once, sweep_done_key
+)
+from app.cache.redis_cache import redis_cache, make_cache_key
+from app.config.settings import settings
+
+
+LEGACY_ENTRY = {
+    "ip": "8.8.4.4",
+    "risk_level": "low",
+    "risk_analysis": "Clean",
+    "recommendations": [],
+    "confidence": "0.8",
+    "model_used": "gpt-4.1-mini",
+}
+
+
+def test_legacy_entry_is_upgraded():
+    migrated, changed = migrate_entry(dict(LEGACY_ENTRY))
+
+    assert changed
+    assert migrated["_schema"] == CACHE_SCHEMA_VERSION
+    assert migrated["risk_level"] == "Low"
+    assert migrated["confidence"] == 0.8
+    assert "asn" in migrated and "network" in migrated
+
+
+def test_retired_model_entry_is_dropped():
+    migrated, changed = migrate_entry({**LEGACY_ENTRY, "model_used": "gemini-1.5-pro"})
+    assert migrated is None
+
+
+def test_current_entry_untouched():
+    entry = stamp({**LEGACY_ENTRY, "risk_level": "Low", "confidence": 0.8})
+    migrated, changed = migrate_entry(entry)
+    assert not changed
+    assert migrated == entry
+
+
+def test_load_entry_migrates_in_place_keeping_ttl():
+    ip = "8.8.4.4"
+    key = make_cache_key(ip, "openai")
+    redis_cache.set(key, LEGACY_ENTRY, ttl=500)
+
+    entry = load_entry(ip, "openai")
+
+    assert entry["_schema"] == CACHE_SCHEMA_VERSION
+    assert redis_cache.get(key)["_schema"] == CACHE_SCHEMA_VERSION
+    assert 0 < redis_cache.client.ttl(key) <= 500
+    redis_cache.delete(key)
+
+
+def test_sweep_moves_legacy_namespace(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_LEGACY_VERSIONS", ["test-legacy"])
+    old_key = make_cache_key("8.8.4.4", "openai", version="test-legacy")
+    new_key = make_cache_key("8.8.4.4", "openai")
+    redis_cache.delete(new_key)
+    redis_cache.client.set(old_key, json.dumps(LEGACY_ENTRY), ex=500)
+
+    stats = sweep()
+
+    assert stats["moved"] >= 1
+    assert redis_cache.get(old_key) is None
+    assert redis_cache.get(new_key)["risk_level"] == "Low"
+    redis_cache.delete(new_key)
+
+
+def test_run_sweep_once_only_sweeps_once_per_deployment(monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_LEGACY_VERSIONS", ["test-once"])
+    redis_cache.delete(sweep_done_key())
+
+    first = run_sweep_once()
+    second = run_sweep_once()
+
+    assert first is not None and "scanned" in first
+    assert second is None
+    assert redis_cache.client.exists(sweep_done_key())
+    redis_cache.delete(sweep_done_key())
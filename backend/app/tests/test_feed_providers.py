@@ -0,0 +1,112 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from unittest.mock import patch
+
+from app.config.settings import settings
+from app.cache.redis_cache import redis_cache
+from app.services.feed_providers import PROVIDERS, ThreatFeedProvider, gather_threat_feeds, _feed_key
+
+
+def _provider(name, delay, weight=1.0, result=None, cost=1.0):
+    async def fetch(ip):
+        await asyncio.sleep(delay)
+        return result if result is not None else {"source": name}
+    return ThreatFeedProvider(name, fetch, cost=cost, timeout=1.0, weight=weight)
+
+
+def _registry(*providers):
+    return patch.dict(PROVIDERS, {p.name: p for p in providers}, clear=True)
+
+
+@pytest.mark.asyncio
+async def test_quorum_returns_before_slow_feed():
+    ip = f"test-{uuid.uuid4().hex}"
+    with _registry(_provider("fast1", 0.01), _provider("fast2", 0.02), _provider("slow", 0.8)), \
+         patch.object(settings, "FEED_STRAGGLERS", "cancel"):
+        start = asyncio.get_running_loop().time()
+        result = await gather_threat_feeds(ip, quorum=0.6, deadline=2)
+        elapsed = asyncio.get_running_loop().time() - start
+
+    assert elapsed < 0.5
+    assert sorted(result["sources"]["contributed"]) == ["fast1", "fast2"]
+    assert result["sources"]["pending"] == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_deadline_bounds_wait_and_failures_are_marked():
+    ip = f"test-{uuid.uuid4().hex}"
+    broken = _provider("broken", 0.01, result={"error": "boom"})
+    with _registry(_provider("fast", 0.01), broken, _provider("slow", 0.8)), \
+         patch.object(settings, "FEED_STRAGGLERS", "cancel"):
+        result = await gather_threat_feeds(ip, quorum=1.0, deadline=0.2)
+
+    assert result["sources"]["contributed"] == ["fast"]
+    assert result["sources"]["failed"] == ["broken"]
+    assert result["sources"]["pending"] == ["slow"]
+
+
+@pytest.mark.asyncio
+async def test_budget_skips_expensive_feeds():
+    ip = f"test-{uuid.uuid4().hex}"
+    with _registry(_provider("cheap", 0.01, cost=1), _provider("pricey", 0.01, cost=5)), \
+         patch.object(settings, "FEED_BUDGET", 2):
+        result = await gather_threat_feeds(ip, quorum=1.0, deadline=1)
+
+    assert result["sources"]["contributed"] == ["cheap"]
+    assert "pricey" not in result["data"]
+
+
+def _flaky_provider(name, weight, failures):
+    calls = []
+
+    async def fetch(ip):
+        calls.append(ip)
+        return {"error": "down"} if len(calls) <= failures else {"source": name}
+    return ThreatFeedProvider(name, fetch, timeout=1.0, weight=weight), calls
+
+
+@pytest.mark.asyncio
+async def test_feeds_missing_from_warm_cache_are_still_reported():
+    ip = f"test-{uuid.uuid4().hex}"
+    geo, geo_calls = _flaky_provider("geo", 0.5, failures=1)
+    with _registry(geo, _provider("abuse", 0.01), _provider("ipqs", 0.01)):
+        first = await gather_threat_feeds(ip, quorum=0.75, deadline=1)
+
+        # Cached answers meet the quorum; the failed feed is retried in the background
+        with patch.object(settings, "FEED_STRAGGLERS", "background"):
+            second = await gather_threat_feeds(ip, quorum=0.75, deadline=1)
+            await asyncio.sleep(0.05)
+
+        with patch.object(settings, "FEED_STRAGGLERS", "cancel"):
+            third = await gather_threat_feeds(ip, quorum=0.75, deadline=1)
+
+    assert first["sources"]["failed"] == ["geo"]
+    assert sorted(second["sources"]["cached"]) == ["abuse", "ipqs"]
+    assert second["sources"]["pending"] == ["geo"]
+    assert len(geo_calls) == 2
+    assert sorted(third["sources"]["cached"]) == ["abuse", "geo", "ipqs"]
+
+    ip = f"test-{uuid.uuid4().hex}"
+    with _registry(_flaky_provider("geo", 0.5, failures=1)[0], _provider("abuse", 0.01), _provider("ipqs", 0.01)), \
+         patch.object(settings, "FEED_STRAGGLERS", "cancel"):
+        await gather_threat_feeds(ip, quorum=0.75, deadline=1)
+        cancelled = await gather_threat_feeds(ip, quorum=0.75, deadline=1)
+
+    assert cancelled["sources"]["skipped"] == ["geo"]
+    assert cancelled["sources"]["pending"] == [] and cancelled["sources"]["failed"] == []
+
+
+@pytest.mark.asyncio
+async def test_corrupt_cached_feed_is_dropped_and_refetched():
+    ip = f"test-{uuid.uuid4().hex}"
+    redis_cache.client.set(_feed_key("fast", ip), "{not json", ex=60)
+
+    with _registry(_provider("fast", 0.01)):
+        result = await gather_threat_feeds(ip, quorum=1.0, deadline=1)
+
+    assert result["sources"]["contributed"] == ["fast"]
+    assert result["sources"]["cached"] == []
+    assert json.loads(redis_cache.client.get(_feed_key("fast", ip))) == {"source": "fast"}
@@ -15,3 +15,50 @@ def test_invalid_ip_format():
 
 def test_reserved_ip():
     assert validate_ip("240.0.0.1") is False
+
+def test_bulk_matches_per_call():
+    from app.utils.ip_validator import validate_ips
+
+    ips = [
+        "8.8.8.8", "192.168.0.1", "127.0.0.1", "999.999.999.999", "240.0.0.1",
+        "224.0.0.1", "0.0.0.0", "2001:4860:4860::8888", "::1", "::", "ff02::1",
+        "fe80::1", "fc00::1", "2001:db8::1", "::ffff:8.8.8.8", "01.2.3.4", "abc", "",
+    ]
+
+    valid, reasons = validate_ips(ips)
+
+    assert list(valid) == [validate_ip(ip) for ip in ips]
+    assert reasons[0] == "ok"
+    assert reasons[1] == "private"
+    assert reasons[3] == "invalid"
+    assert reasons[5] == "multicast"
+    assert reasons[10] == "multicast"
+
+
+def test_bulk_tables_pin_stdlib_boundaries():
+    # First/last address of every table network and the addresses just
+    # outside it must classify exactly like validate_ip() on this Python.
+    import ipaddress
+    from app.utils.ip_validator import validate_ips, _V4_RULES, _V6_RULES
+
+    ips = []
+    for rules, family, bits in ((_V4_RULES, ipaddress.IPv4Address, 32), (_V6_RULES, ipaddress.IPv6Address, 128)):
+        top = 2 ** bits - 1
+        for _, include, exclude in rules:
+            for table in (include, exclude):
+                if table is None:
+                    continue
+                for row in table:
+                    if family is ipaddress.IPv4Address:
+                        net, mask = int(row[0]), int(row[1])
+                    else:
+                        net, mask = (int(row[0]) << 64) | int(row[1]), (int(row[2]) << 64) | int(row[3])
+                    last = net | (~mask & top)
+                    for value in (net - 1, net, last, last + 1):
+                        if 0 <= value <= top:
+                            ips.append(str(family(value)))
+
+    valid, _ = validate_ips(ips)
+
+    assert len(ips) > 50
+    assert [ip for ip, ok in zip(ips, valid) if ok != validate_ip(ip)] == []
@@ -36,3 +36,34 @@ async def test_llm_valid_json():
             assert result["risk_level"] == "Low"
             assert result["confidence"] == 0.9
             assert result["recommendations"] == ["Monitor"]
+
+
+@pytest.mark.asyncio
+async def test_llm_call_cache_reuses_valid_output_only():
+    import uuid
+    from app.ai.llm_risk_analyzer import cached_completion, _parses, llm_cache_key
+    from app.cache.redis_cache import redis_cache
+
+    payload = f"chunk-{uuid.uuid4().hex}"
+    calls = []
+    replies = ["not json", '{"signals": [], "summary": "ok"}']
+
+    async def mock_create(*args, **kwargs):
+        calls.append(1)
+        content = replies[len(calls) - 1]
+        class FakeChoice:
+            message = type("obj", (object,), {"content": content})
+        usage = type("obj", (object,), {"prompt_tokens": 100, "completion_tokens": 20})
+        return type("obj", (object,), {"choices": [FakeChoice()], "usage": usage})
+
+    with patch("app.ai.llm_risk_analyzer.client.chat.completions.create", new=mock_create):
+        first = await cached_completion("gpt-4.1-mini", "compress", payload, "p", 0.1, cacheable=_parses)
+        second = await cached_completion("gpt-4.1-mini", "compress", payload, "p", 0.1, cacheable=_parses)
+        third = await cached_completion("gpt-4.1-mini", "compress", payload, "p", 0.1, cacheable=_parses)
+
+    redis_cache.delete(llm_cache_key("gpt-4.1-mini", "compress", payload))
+
+    # Malformed reply is not cached, the valid one is served from cache
+    assert first == "not json"
+    assert second == third == replies[1]
+    assert len(calls) == 2
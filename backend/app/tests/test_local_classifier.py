@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.ai.local_classifier import (
+    CLASSES, LocalClassifier, build_dataset, calibrate_temperature, evaluate, train
+)
+
+
+def _entries(n=600, seed=1):
+    rng = np.random.default_rng(seed)
+    entries = []
+    for _ in range(n):
+        abuse = int(rng.integers(0, 101))
+        level = "High" if abuse > 70 else "Medium" if abuse > 30 else "Low"
+        entries.append({
+            "abuse_score": abuse,
+            "fraud_score": int(min(100, max(0, abuse + rng.normal(0, 10)))),
+            "recent_reports": int(abuse * 3),
+            "vpn_proxy": bool(rng.random() < abuse / 200),
+            "risk_level": level,
+            "model_used": "gpt-4.1-mini",
+        })
+    return entries
+
+
+def test_build_dataset_keeps_only_llm_labels():
+    entries = _entries(10) + [{"abuse_score": 99, "risk_level": "High", "model_used": "local-logreg"}]
+    X, y = build_dataset(entries)
+    assert X.shape[0] == len(y) == 10
+
+
+def test_train_agrees_with_labels_and_roundtrips(tmp_path):
+    X, y = build_dataset(_entries())
+    model = train(X[:400], y[:400])
+    calibrate_temperature(model, X[400:500], y[400:500])
+    report = evaluate(model, X[500:], y[500:], threshold=0.9)
+
+    assert report["agreement"] > 0.85
+    assert report["agreement_when_confident"] >= report["agreement"]
+    assert set(report["per_class"]) == set(CLASSES)
+
+    path = tmp_path / "model.npz"
+    model.save(str(path))
+    loaded = LocalClassifier.load(str(path))
+
+    entry = {"abuse_score": 95, "fraud_score": 90, "recent_reports": 300}
+    assert loaded.predict(entry) == model.predict(entry)
+    assert loaded.predict(entry)[0] == "High"
+
+
+def test_load_dataset_reduces_batches_to_features():
+    import json
+    from app.cache.redis_cache import redis_cache
+    from app.cli.train_classifier import load_dataset
+
+    entries = _entries(25) + [{"abuse_score": 99, "risk_level": "High", "model_used": "local-logreg"}]
+    keys = [f"ipintel:test-train:openai:10.0.0.{i}" for i in range(len(entries))]
+    for key, entry in zip(keys, entries):
+        redis_cache.client.set(key, json.dumps(entry), ex=60)
+    redis_cache.client.set("ipintel:test-train:openai:broken", "{not json", ex=60)
+
+    try:
+        X, y = load_dataset("ipintel:test-train:openai:*", batch=7)
+    finally:
+        redis_cache.client.delete(*keys, "ipintel:test-train:openai:broken")
+
+    expected_X, expected_y = build_dataset(entries)
+    assert X.shape == expected_X.shape
+    assert sorted(y.tolist()) == sorted(expected_y.tolist())
@@ -0,0 +1,139 @@
+import random
+from unittest.mock import patch
+
+from app.cache.redis_cache import redis_cache
+from app.services import network_reputation
+from app.services.network_reputation import (
+    record_verdict, lookup_network, summarize_network, network_verdict, prefixes_for
+)
+
+
+def _verdict(ip, level, abuse=90):
+    return {"ip": ip, "risk_level": level, "abuse_score": abuse, "fraud_score": 80, "asn": "AS64500"}
+
+
+def _cleanup(second_octet):
+    for key in redis_cache.client.scan_iter(f"ipintel:net:*61.{second_octet}.*"):
+        redis_cache.delete(key)
+    redis_cache.delete("ipintel:asn:AS64500")
+
+
+def test_prefixes_for_ipv4_and_ipv6():
+    assert prefixes_for("8.8.8.8", [24, 16]) == ["8.8.8.0/24", "8.8.0.0/16"]
+    assert prefixes_for("2001:db8::1", [48]) == ["2001:db8::/48"]
+
+
+def test_longest_prefix_match_and_verdict():
+    octet = random.randint(0, 255)
+    try:
+        for host in range(1, 6):
+            record_verdict(_verdict(f"61.{octet}.7.{host}", "High"))
+
+        reputation = lookup_network(f"61.{octet}.7.200")
+        assert reputation["prefix"] == f"61.{octet}.7.0/24"
+        assert reputation["samples"] == 5
+        assert reputation["verdict"] == "High"
+        assert reputation["avg_abuse_score"] == 90
+
+        inferred = network_verdict(f"61.{octet}.7.200", reputation)
+        assert inferred["risk_level"] == "High"
+        assert inferred["model_used"] == "network-reputation"
+    finally:
+        _cleanup(octet)
+
+
+def test_coarse_prefix_does_not_short_circuit():
+    octet = random.randint(0, 255)
+    try:
+        # Five High verdicts spread over five different /24s of one /16
+        for third in range(1, 6):
+            record_verdict(_verdict(f"61.{octet}.{third}.1", "High"))
+
+        reputation = lookup_network(f"61.{octet}.250.9")
+        assert reputation["prefix"] == f"61.{octet}.0.0/16"
+        assert reputation["verdict"] == "High"
+
+        # Context for the LLM only, never an inferred verdict
+        assert network_verdict(f"61.{octet}.250.9", reputation) is None
+    finally:
+        _cleanup(octet)
+
+
+def test_reanalysis_replaces_previous_vote():
+    octet = random.randint(0, 255)
+    ip = f"61.{octet}.9.1"
+    try:
+        record_verdict(_verdict(ip, "High"))
+        record_verdict(_verdict(ip, "High"))
+        record_verdict(_verdict(ip, "Low", abuse=0))
+
+        reputation = lookup_network(ip, min_samples=1)
+        assert reputation["samples"] == 1
+        assert reputation["risk_distribution"] == {"High": 0, "Medium": 0, "Low": 1}
+    finally:
+        _cleanup(octet)
+
+
+def test_unchanged_vote_refreshes_ttl():
+    octet = random.randint(0, 255)
+    ip = f"61.{octet}.9.2"
+    keys = [f"ipintel:net:members:61.{octet}.9.0/24", f"ipintel:net:61.{octet}.9.0/24",
+            f"ipintel:net:61.{octet}.0.0/16", "ipintel:asn:AS64500"]
+    try:
+        record_verdict(_verdict(ip, "High"))
+        for key in keys:
+            redis_cache.client.expire(key, 60)
+
+        record_verdict(_verdict(ip, "High"))
+
+        assert all(redis_cache.client.ttl(key) > 60 for key in keys)
+        assert lookup_network(ip, min_samples=1)["samples"] == 1
+    finally:
+        _cleanup(octet)
+
+
+def test_concurrent_writer_does_not_double_count():
+    octet = random.randint(0, 255)
+    ip = f"61.{octet}.9.3"
+    apply_vote = network_reputation._apply_vote
+    raced = []
+
+    def racing_apply(pipe, key, vote, sign):
+        # Another writer re-analyzes the same IP between our read and our write
+        if not raced:
+            raced.append(True)
+            record_verdict(_verdict(ip, "Medium"))
+        apply_vote(pipe, key, vote, sign)
+
+    try:
+        record_verdict(_verdict(ip, "High"))
+        with patch.object(network_reputation, "_apply_vote", new=racing_apply):
+            record_verdict(_verdict(ip, "Low", abuse=0))
+
+        reputation = lookup_network(ip, min_samples=1)
+        assert reputation["samples"] == 1
+        assert reputation["risk_distribution"] == {"High": 0, "Medium": 0, "Low": 1}
+    finally:
+        _cleanup(octet)
+
+
+def test_summarize_network_resolution():
+    octet = random.randint(0, 255)
+    try:
+        record_verdict(_verdict(f"61.{octet}.16.1", "High"))
+        record_verdict(_verdict(f"61.{octet}.17.1", "Medium"))
+
+        exact = summarize_network(f"61.{octet}.0.0/16")
+        assert exact["source"] == "exact"
+        assert exact["samples"] == 2
+
+        merged = summarize_network(f"61.{octet}.16.0/20")
+        assert merged["source"] == "subnets"
+        assert merged["subnets_with_data"] == 2
+        assert merged["asn"] == "AS64500"
+
+        covering = summarize_network(f"61.{octet}.16.0/28")
+        assert covering["source"] == "covering"
+        assert covering["prefix"] == f"61.{octet}.16.0/24"
+    finally:
+        _cleanup(octet)
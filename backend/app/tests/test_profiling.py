@@ -0,0 +1,158 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache.redis_cache import redis_cache, make_cache_key
+from app.config.settings import settings
+from app.utils.profiling import TRACE_RING_KEY, RequestTrace, _Metered, current_trace, stage
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def profiling(monkeypatch):
+    redis_cache.client.delete(TRACE_RING_KEY)
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS", True)
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "PROFILE_STACK_INTERVAL_MS", 1)
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "test-secret")
+    yield
+    redis_cache.client.delete(TRACE_RING_KEY)
+
+
+async def _feeds(ip):
+    await asyncio.sleep(0.05)
+    return {
+        "data": {"ipapi": {"country": "US"}},
+        "sources": {"contributed": ["ipapi"], "cached": [], "failed": [], "pending": []}
+    }
+
+
+def _busy_llm(seconds):
+    async def llm(*args, **kwargs):
+        end = time.thread_time() + seconds
+        while time.thread_time() < end:
+            pass
+        return {
+            "risk_level": "Low",
+            "risk_analysis": "Clean",
+            "recommendations": [],
+            "confidence": 0.8,
+            "model_used": "gpt-4.1-mini"
+        }
+    return llm
+
+
+def _analyze(ip, headers=None, llm_seconds=0.1):
+    redis_cache.delete(make_cache_key(ip, "openai"))
+    with patch("app.services.ip_analyzer_service.gather_threat_feeds", new=_feeds), \
+         patch("app.services.ip_analyzer_service.generate_risk_assessment", new=_busy_llm(llm_seconds)):
+        resp = client.get(f"/api/analyze-ip?ip={ip}", headers=headers or {})
+    redis_cache.delete(make_cache_key(ip, "openai"))
+    return resp
+
+
+def test_profile_header_records_stages_and_cpu(profiling):
+    resp = _analyze("9.9.7.1", headers={"X-Profile": "test-secret"})
+
+    assert resp.status_code == 200
+    trace_id = resp.headers["X-Trace-Id"]
+
+    listed = client.get("/debug/traces").json()
+    assert [t["id"] for t in listed] == [trace_id]
+
+    trace = client.get(f"/debug/traces/{trace_id}").json()
+    stages = {s["name"]: s for s in trace["spans"] if s["kind"] == "stage"}
+
+    assert {"cache_lookup", "feeds", "llm", "cache_store"} <= set(stages)
+    assert stages["feeds"]["duration_ms"] >= 50
+    assert stages["feeds"]["cpu_ms"] < stages["feeds"]["duration_ms"]
+    assert stages["llm"]["cpu_ms"] >= 80
+    assert trace["cpu_ms"] >= stages["llm"]["cpu_ms"]
+    assert any(e["name"] == "cache_miss" for e in trace["events"])
+
+    # The busy LLM dominates the sampled stacks
+    stacks = trace["profile"]["stacks"]
+    assert trace["profile"]["samples"] > 0
+    assert "llm (test_profiling.py" in stacks[0][0]
+
+
+def test_unprofiled_request_has_no_trace(profiling):
+    resp = _analyze("9.9.7.2", llm_seconds=0)
+
+    assert "X-Trace-Id" not in resp.headers
+    assert client.get("/debug/traces").json() == []
+
+
+def test_profile_header_requires_token(profiling, monkeypatch):
+    assert "X-Trace-Id" not in client.get("/health", headers={"X-Profile": "1"}).headers
+
+    monkeypatch.setattr(settings, "PROFILE_TOKEN", "")
+    assert "X-Trace-Id" not in client.get("/health", headers={"X-Profile": ""}).headers
+
+    assert client.get("/debug/traces").json() == []
+
+
+def test_sampled_requests_stored_only_when_slow(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "PROFILE_SLOW_MS", 150)
+
+    fast = _analyze("9.9.7.3", llm_seconds=0)
+    slow = _analyze("9.9.7.4", llm_seconds=0.2)
+
+    listed = client.get("/debug/traces").json()
+    assert [t["id"] for t in listed] == [slow.headers["X-Trace-Id"]]
+    assert listed[0]["reason"] == "sampled"
+    assert listed[0]["slowest_stage"] == "llm"
+    assert fast.headers["X-Trace-Id"] not in [t["id"] for t in listed]
+
+
+def test_ring_buffer_is_bounded(profiling, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_RING_SIZE", 2)
+
+    for _ in range(3):
+        client.get("/health", headers={"X-Profile": "test-secret"})
+
+    assert len(client.get("/debug/traces").json()) == 2
+
+
+def test_debug_endpoints_disabled_by_default(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_ENDPOINTS", False)
+
+    assert client.get("/debug/traces").status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_metered_passes_results_errors_and_cancellation():
+    trace = RequestTrace("GET", "/", "", "requested")
+
+    async def ok():
+        await asyncio.sleep(0)
+        with stage("inner"):
+            await asyncio.sleep(0.01)
+        return 42
+
+    async def fails():
+        await asyncio.sleep(0)
+        raise ValueError("boom")
+
+    token = current_trace.set(trace)
+    try:
+        assert await _Metered(ok(), trace) == 42
+        with pytest.raises(ValueError):
+            await _Metered(fails(), trace)
+
+        task = asyncio.ensure_future(_Metered(asyncio.sleep(10), trace))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    finally:
+        current_trace.reset(token)
+
+    assert trace.loop_steps >= 4
+    assert [s["name"] for s in trace.spans] == ["inner"]
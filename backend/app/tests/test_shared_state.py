@@ -0,0 +1,44 @@
+import uuid
+
+from app.cache.shared_state import (
+    acquire_lock, release_lock, is_locked, incr_metric, get_metrics, rate_limit_allow
+)
+
+
+def test_lock_is_exclusive():
+    name = f"test:{uuid.uuid4().hex}"
+
+    token = acquire_lock(name, ttl=30)
+    assert token is not None
+    assert acquire_lock(name, ttl=30) is None
+    assert is_locked(name)
+
+    release_lock(name, token)
+    assert not is_locked(name)
+
+
+def test_lock_release_requires_owner():
+    name = f"test:{uuid.uuid4().hex}"
+
+    token = acquire_lock(name, ttl=30)
+    release_lock(name, "not-the-owner")
+    assert is_locked(name)
+
+    release_lock(name, token)
+
+
+def test_metrics_increment():
+    name = f"test_counter_{uuid.uuid4().hex}"
+
+    incr_metric(name)
+    incr_metric(name, 2)
+
+    assert get_metrics()[name] == 3
+
+
+def test_rate_limit_blocks_after_limit():
+    client_id = f"test-{uuid.uuid4().hex}"
+
+    assert rate_limit_allow(client_id, limit=2)
+    assert rate_limit_allow(client_id, limit=2)
+    assert not rate_limit_allow(client_id, limit=2)
@@ -0,0 +1,67 @@
+import io
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.cache.bulk import export_entries, import_entries
+from app.cache.redis_cache import redis_cache
+from app.cli.warm_cache import extract_ips, warm
+from app.services.admission import OverloadedError
+
+
+def test_extract_ips_from_mixed_sources():
+    lines = [
+        '8.8.8.8 - - [10/Oct/2025:13:55:36 +0000] "GET /api HTTP/1.1" 200 512',
+        "ipintel:v1:openai:1.1.1.1",
+        "ipintel:v1:openai:2606:4700:4700::1111",
+        "192.168.1.10 internal",
+        "8.8.8.8 again",
+        "not an ip",
+    ]
+
+    assert extract_ips(lines) == ["8.8.8.8", "1.1.1.1", "2606:4700:4700::1111"]
+
+
+def test_export_import_roundtrip():
+    prefix = f"ipintel:test-{uuid.uuid4().hex}"
+    entries = {f"{prefix}:openai:8.8.{i}.1": {"risk_level": "Low", "n": i} for i in range(5)}
+    for key, value in entries.items():
+        redis_cache.set(key, value, ttl=300)
+
+    dump = io.StringIO()
+    assert export_entries(dump, pattern=f"{prefix}:*", batch=2) == 5
+
+    for key in entries:
+        redis_cache.delete(key)
+
+    dump.seek(0)
+    assert import_entries(dump, batch=2) == 5
+
+    for key, value in entries.items():
+        assert redis_cache.get(key) == value
+        assert 0 < redis_cache.client.ttl(key) <= 300
+        redis_cache.delete(key)
+
+    exported = [json.loads(line) for line in dump.getvalue().splitlines()]
+    assert all(e["ttl"] and e["ttl"] <= 300 for e in exported)
+
+
+@pytest.mark.asyncio
+async def test_overloaded_retry_counts_like_first_attempt(capsys):
+    calls = {}
+
+    async def busy_then(ip):
+        calls[ip] = calls.get(ip, 0) + 1
+        if calls[ip] == 1:
+            raise OverloadedError("busy", retry_after=0)
+        if ip == "9.9.5.2":
+            raise RuntimeError("feeds down")
+        return {"ip": ip, "risk_level": "unknown" if ip == "9.9.5.1" else "Low"}
+
+    with patch("app.services.ip_analyzer_service.analyze_ip", new=busy_then):
+        stats = await warm(["9.9.5.1", "9.9.5.2", "9.9.5.3"], rate=1000, force=True)
+
+    assert stats == {"analyzed": 1, "skipped": 0, "failed": 2}
+    assert "[WARM] 9.9.5.2 failed: feeds down" in capsys.readouterr().out
@@ -1,4 +1,8 @@
 import ipaddress
+import socket
+from typing import List, Sequence, Tuple
+
+import numpy as np
 
 def validate_ip(ip: str) -> bool:
     """
@@ -30,3 +34,152 @@ def validate_ip(ip: str) -> bool:
 
     except ValueError:
         return False
+
+
+
+# BULK VALIDATION (vectorized)
+#
+# validate_ip() builds an ipaddress object and walks five properties per
+# call. For log-sized batches, validate_ips() instead packs every address
+# into integers (IPv4 → uint32, IPv6 → two uint64 halves) and tests whole
+# arrays against precomputed (network, mask) tables with NumPy.
+#
+# The tables are read from the stdlib's own constants so both paths agree
+# on every Python version (the special-purpose registries change between
+# releases).
+
+REASONS = ("ok", "invalid", "private", "loopback", "reserved", "unspecified", "multicast")
+REASON_OK, REASON_INVALID, REASON_PRIVATE, REASON_LOOPBACK, \
+    REASON_RESERVED, REASON_UNSPECIFIED, REASON_MULTICAST = range(len(REASONS))
+
+# NOTE: _IPv4Constants / _IPv6Constants are private stdlib classes, read
+# because they are the exact tables behind the is_* properties. Their
+# attribute names may change between Python releases;
+# test_bulk_tables_pin_stdlib_boundaries checks the edges of every table
+# against validate_ip() on the running interpreter.
+_V4 = ipaddress._IPv4Constants
+_V6 = ipaddress._IPv6Constants
+
+
+def _v4_table(networks) -> np.ndarray:
+    return np.array(
+        [(int(n.network_address), int(n.netmask)) for n in networks], dtype=np.uint32
+    ).reshape(-1, 2)
+
+
+def _v6_table(networks) -> np.ndarray:
+    rows = []
+    for n in networks:
+        net, mask = int(n.network_address), int(n.netmask)
+        rows.append((net >> 64, net & 0xFFFFFFFFFFFFFFFF, mask >> 64, mask & 0xFFFFFFFFFFFFFFFF))
+    return np.array(rows, dtype=np.uint64).reshape(-1, 4)
+
+
+# (reason, include table, exclude table) in validate_ip's precedence order
+_V4_RULES = [
+    (REASON_PRIVATE, _v4_table(_V4._private_networks),
+     _v4_table(getattr(_V4, "_private_networks_exceptions", []))),
+    (REASON_LOOPBACK, _v4_table([_V4._loopback_network]), None),
+    (REASON_RESERVED, _v4_table([_V4._reserved_network]), None),
+    (REASON_UNSPECIFIED, _v4_table([ipaddress.IPv4Network("0.0.0.0/32")]), None),
+    (REASON_MULTICAST, _v4_table([_V4._multicast_network]), None),
+]
+
+_V6_RULES = [
+    (REASON_PRIVATE, _v6_table(_V6._private_networks),
+     _v6_table(getattr(_V6, "_private_networks_exceptions", []))),
+    (REASON_LOOPBACK, _v6_table([ipaddress.IPv6Network("::1/128")]), None),
+    (REASON_RESERVED, _v6_table(_V6._reserved_networks), None),
+    (REASON_UNSPECIFIED, _v6_table([ipaddress.IPv6Network("::/128")]), None),
+    (REASON_MULTICAST, _v6_table([_V6._multicast_network]), None),
+]
+
+
+def _match_v4(values: np.ndarray, table) -> np.ndarray:
+    hit = np.zeros(values.shape, dtype=bool)
+    if table is None:
+        return hit
+    for net, mask in table:
+        hit |= (values & mask) == net
+    return hit
+
+
+def _match_v6(hi: np.ndarray, lo: np.ndarray, table) -> np.ndarray:
+    hit = np.zeros(hi.shape, dtype=bool)
+    if table is None:
+        return hit
+    for net_hi, net_lo, mask_hi, mask_lo in table:
+        hit |= ((hi & mask_hi) == net_hi) & ((lo & mask_lo) == net_lo)
+    return hit
+
+
+def _classify(matchers, rules, size: int) -> np.ndarray:
+    codes = np.zeros(size, dtype=np.uint8)
+    # Lowest precedence first so higher-precedence reasons overwrite
+    for reason, include, exclude in reversed(rules):
+        mask = matchers(include)
+        if exclude is not None and len(exclude):
+            mask &= ~matchers(exclude)
+        codes[mask] = reason
+    return codes
+
+
+def pack_ips(ips: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse addresses into packed integer arrays.
+
+    Returns (v4_index, v4_values, v6_index, v6_hi, v6_lo): positions in `ips`
+    and the big-endian integers of each family. Anything that is not a
+    strict IPv4/IPv6 literal appears in neither index.
+    """
+    v4_buf, v4_idx = bytearray(), []
+    v6_buf, v6_idx = bytearray(), []
+    inet_pton = socket.inet_pton
+
+    for i, ip in enumerate(ips):
+        if not isinstance(ip, str):
+            continue
+        if ":" in ip:
+            try:
+                v6_buf += inet_pton(socket.AF_INET6, ip.split("%", 1)[0])
+                v6_idx.append(i)
+            except (OSError, ValueError):
+                pass
+        else:
+            try:
+                v4_buf += inet_pton(socket.AF_INET, ip)
+                v4_idx.append(i)
+            except (OSError, ValueError):
+                pass
+
+    v4_values = np.frombuffer(bytes(v4_buf), dtype=">u4").astype(np.uint32)
+    v6_pairs = np.frombuffer(bytes(v6_buf), dtype=">u8").astype(np.uint64).reshape(-1, 2)
+
+    return (
+        np.array(v4_idx, dtype=np.int64), v4_values,
+        np.array(v6_idx, dtype=np.int64), v6_pairs[:, 0], v6_pairs[:, 1],
+    )
+
+
+def classify_ips(ips: Sequence[str]) -> np.ndarray:
+    """
+    Reason code per address (index into REASONS); REASON_OK means public.
+    """
+    codes = np.full(len(ips), REASON_INVALID, dtype=np.uint8)
+    v4_idx, v4_values, v6_idx, v6_hi, v6_lo = pack_ips(ips)
+
+    if len(v4_idx):
+        codes[v4_idx] = _classify(lambda t: _match_v4(v4_values, t), _V4_RULES, len(v4_idx))
+    if len(v6_idx):
+        codes[v6_idx] = _classify(lambda t: _match_v6(v6_hi, v6_lo, t), _V6_RULES, len(v6_idx))
+
+    return codes
+
+
+def validate_ips(ips: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Bulk counterpart of validate_ip().
+    Returns (valid mask, reason per address).
+    """
+    codes = classify_ips(ips)
+    return codes == REASON_OK, [REASONS[c] for c in codes]
@@ -1,12 +1,13 @@
 from app.utils.error_handlers import safe_extract
 
 
-def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data):
+def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data, vt_data=None):
     """
     Normalize responses from:
     - AbuseIPDB
     - IPQualityScore
     - IPAPI
+    - VirusTotal (optional)
 
     Ensures consistent structured output even when some APIs fail.
     """
@@ -15,6 +16,8 @@ def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data):
     hostname = safe_extract(geo_data, "hostname")
     isp = safe_extract(geo_data, "isp")
     country = safe_extract(geo_data, "country")
+    asn = safe_extract(geo_data, "asn")
+    network = safe_extract(geo_data, "network")
 
     abuse_score = safe_extract(abuse_data, "abuseConfidenceScore")
     recent_reports = safe_extract(abuse_data, "totalReports")
@@ -22,12 +25,18 @@ def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data):
     vpn_proxy = safe_extract(ipqs_data, "proxy")
     fraud_score = safe_extract(ipqs_data, "fraud_score") or safe_extract(ipqs_data, "fraud_score", default=None)
 
+    vt_data = vt_data or {}
+    vt_malicious = safe_extract(vt_data, "malicious")
+    vt_reputation = safe_extract(vt_data, "reputation")
+
     # Build unified normalized structure
     normalized = {
         "ip": ip,
         "hostname": hostname,
         "isp": isp,
         "country": country,
+        "asn": asn,
+        "network": network,
 
         "abuse_score": abuse_score,
         "recent_reports": recent_reports,
@@ -35,6 +44,9 @@ def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data):
         "vpn_proxy": vpn_proxy,
         "fraud_score": fraud_score,
 
+        "vt_malicious": vt_malicious,
+        "vt_reputation": vt_reputation,
+
         "raw_sources": {
             "abuseipdb": abuse_data,
             "ipqualityscore": ipqs_data,
@@ -42,4 +54,7 @@ def normalize_all_sources(ip, abuse_data, ipqs_data, geo_data):
         }
     }
 
+    if vt_data:
+        normalized["raw_sources"]["virustotal"] = vt_data
+
     return normalized
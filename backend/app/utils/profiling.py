@@ -0,0 +1,399 @@
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import redis
+
+from app.cache.redis_cache import redis_cache
+from app.cache.shared_state import incr_metric
+from app.config.settings import settings
+
+
+# Per-Request Profiling
+#
+# Opt-in per request (X-Profile: <PROFILE_TOKEN>) or by sampling
+# (PROFILE_SAMPLE_RATE).
+# A profiled request gets a RequestTrace in a contextvar; the service code
+# records into it through cheap no-op helpers when no trace is active:
+#
+#   with stage("feeds"):  ...     timed span (wall + on-CPU time of the request)
+#   await timed_io("feed:x", c)   awaited I/O span (also from child tasks)
+#   event("llm_attempt", ...)     point event (attempts, retries, cache hits)
+#
+# On-CPU time is exact for the request's own task: ProfilingMiddleware
+# drives the downstream app through _Metered, which reads thread_time()
+# around every step the event loop gives it. While a step runs, a sampling
+# thread (PROFILE_STACK_INTERVAL_MS) attributes the loop thread's stack to
+# that request, producing collapsed stacks ready for a flame graph.
+#
+# Traces of explicitly profiled requests, and of sampled requests slower
+# than PROFILE_SLOW_MS, go to a Redis ring buffer shared by all workers
+# (LPUSH + LTRIM to PROFILE_RING_SIZE), served under /debug/traces.
+
+TRACE_RING_KEY = "ipintel:traces"
+MAX_STACK_DEPTH = 64
+MAX_STACKS = 50
+
+current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("current_trace", default=None)
+
+
+class RequestTrace:
+    def __init__(self, method: str, path: str, query: str, reason: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.query = query
+        self.reason = reason  # "requested" | "sampled"
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.cpu = 0.0
+        self.step_started: Optional[float] = None
+        self.loop_steps = 0
+        self.spans: List[Dict[str, Any]] = []
+        self.events: List[Dict[str, Any]] = []
+        self.samples: Counter = Counter()
+        self.status: Optional[int] = None
+        self.duration: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 3)
+
+    def cpu_now(self) -> float:
+        """
+        On-CPU time of the request task so far, including the running step.
+        """
+        if self.step_started is None:
+            return self.cpu
+        return self.cpu + time.thread_time() - self.step_started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "status": self.status,
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "cpu_ms": round(self.cpu * 1000, 3),
+            "loop_steps": self.loop_steps,
+            "spans": self.spans,
+            "events": self.events,
+            "profile": {
+                "interval_ms": settings.PROFILE_STACK_INTERVAL_MS,
+                "samples": sum(self.samples.values()),
+                "stacks": self.samples.most_common(MAX_STACKS),
+            },
+        }
+
+
+
+# Recording helpers (no-ops without an active trace)
+
+class _Stage:
+    __slots__ = ("trace", "name", "attrs", "start_ms", "cpu_start")
+
+    def __init__(self, trace: RequestTrace, name: str, attrs: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start_ms = self.trace.elapsed_ms()
+        self.cpu_start = self.trace.cpu_now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        span = {
+            "kind": "stage",
+            "name": self.name,
+            "start_ms": self.start_ms,
+            "duration_ms": round(self.trace.elapsed_ms() - self.start_ms, 3),
+            "cpu_ms": round((self.trace.cpu_now() - self.cpu_start) * 1000, 3),
+        }
+        if exc_type is not None:
+            span["error"] = exc_type.__name__
+        if self.attrs:
+            span["attrs"] = self.attrs
+        self.trace.spans.append(span)
+        return False
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str, **attrs):
+    trace = current_trace.get()
+    if trace is None:
+        return _NO_STAGE
+    return _Stage(trace, name, attrs)
+
+
+async def timed_io(name: str, awaitable, **attrs):
+    """
+    Await `awaitable`, recording it as an I/O span on the active trace.
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return await awaitable
+
+    start_ms = trace.elapsed_ms()
+    span = {"kind": "io", "name": name, "start_ms": start_ms}
+    if attrs:
+        span["attrs"] = attrs
+    try:
+        return await awaitable
+    except BaseException as e:
+        span["error"] = type(e).__name__
+        raise
+    finally:
+        span["duration_ms"] = round(trace.elapsed_ms() - start_ms, 3)
+        trace.spans.append(span)
+
+
+def event(name: str, **attrs):
+    trace = current_trace.get()
+    if trace is not None:
+        trace.events.append({"name": name, "at_ms": trace.elapsed_ms(), **attrs})
+
+
+
+# CPU metering + stack sampling
+
+# thread id → trace whose task is running a step on that thread
+_on_cpu: Dict[int, RequestTrace] = {}
+
+
+class _Metered:
+    """
+    Awaitable driving `coro` step by step, charging each step's thread CPU
+    time to `trace`.
+    """
+    def __init__(self, coro, trace: RequestTrace):
+        self.coro = coro
+        self.trace = trace
+
+    def __await__(self):
+        coro, trace = self.coro, self.trace
+        tid = threading.get_ident()
+        value, error = None, None
+
+        while True:
+            trace.loop_steps += 1
+            trace.step_started = time.thread_time()
+            _on_cpu[tid] = trace
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                _on_cpu.pop(tid, None)
+                trace.cpu += time.thread_time() - trace.step_started
+                trace.step_started = None
+
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:  # cancellation and other throws
+                value, error = None, e
+
+
+_DRIVER_CODE = _Metered.__await__.__code__
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})"
+
+
+def _collapse(frame) -> Optional[str]:
+    """
+    Collapsed stack (root;...;leaf) up to the _Metered driver frame,
+    or None if the sampled frame is not inside a metered request.
+    """
+    labels = []
+    while frame is not None:
+        if frame.f_code is _DRIVER_CODE:
+            return ";".join(reversed(labels)) if labels else None
+        if len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return None
+
+
+class _StackSampler:
+    """
+    Single daemon thread, sleeping while no profiled request is in flight.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enter(self):
+        if settings.PROFILE_STACK_INTERVAL_MS <= 0:
+            return
+        with self._lock:
+            self._active += 1
+            self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def exit(self):
+        if settings.PROFILE_STACK_INTERVAL_MS <= 0:
+            return
+        with self._lock:
+            self._active = max(self._active - 1, 0)
+            if self._active == 0:
+                self._wake.clear()
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._wake.wait()
+            time.sleep(max(settings.PROFILE_STACK_INTERVAL_MS, 1) / 1000)
+
+            frames = sys._current_frames()
+            for tid, trace in list(_on_cpu.items()):
+                if tid == me or tid not in frames:
+                    continue
+                stack = _collapse(frames[tid])
+                if stack:
+                    trace.samples[stack] += 1
+
+
+_sampler = _StackSampler()
+
+
+
+# Ring buffer (Redis, shared by all workers)
+
+def store_trace(trace: RequestTrace):
+    try:
+        pipe = redis_cache.client.pipeline()
+        pipe.lpush(TRACE_RING_KEY, json.dumps(trace.to_dict(), default=str))
+        pipe.ltrim(TRACE_RING_KEY, 0, settings.PROFILE_RING_SIZE - 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"[PROFILE] Could not store trace {trace.id}: {e}")
+
+
+def list_traces(limit: int = 50, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Newest first, summarized (no spans/stacks).
+    """
+    summaries = []
+    for raw in redis_cache.client.lrange(TRACE_RING_KEY, 0, -1):
+        trace = json.loads(raw)
+        if trace["duration_ms"] < min_ms:
+            continue
+        stages = [s for s in trace["spans"] if s["kind"] == "stage"]
+        slowest = max(stages, key=lambda s: s["duration_ms"], default=None)
+        summaries.append({
+            "id": trace["id"],
+            "path": trace["path"],
+            "query": trace["query"],
+            "reason": trace["reason"],
+            "started_at": trace["started_at"],
+            "status": trace["status"],
+            "duration_ms": trace["duration_ms"],
+            "cpu_ms": trace["cpu_ms"],
+            "slowest_stage": slowest["name"] if slowest else None,
+        })
+        if len(summaries) >= limit:
+            break
+    return summaries
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    for raw in redis_cache.client.lrange(TRACE_RING_KEY, 0, -1):
+        trace = json.loads(raw)
+        if trace["id"] == trace_id:
+            return trace
+    return None
+
+
+
+# ASGI middleware
+
+class ProfilingMiddleware:
+    """
+    Traces a request when it sends X-Profile matching PROFILE_TOKEN (so
+    anonymous callers cannot start the sampler or flush the ring buffer)
+    or when picked by PROFILE_SAMPLE_RATE; the trace id is returned in
+    X-Trace-Id. Requested traces are always stored, sampled ones only
+    when slower than PROFILE_SLOW_MS.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    def _reason(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["path"].startswith("/debug"):
+            return None
+        if settings.PROFILE_TOKEN:
+            token = settings.PROFILE_TOKEN.encode()
+            for key, value in scope.get("headers", []):
+                if key.lower() == b"x-profile" and hmac.compare_digest(value.strip(), token):
+                    return "requested"
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope)
+        if reason is None:
+            return await self.app(scope, receive, send)
+
+        trace = RequestTrace(
+            scope.get("method", ""), scope["path"], scope.get("query_string", b"").decode(), reason
+        )
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace.id.encode())]
+            await send(message)
+
+        token = current_trace.set(trace)
+        _sampler.enter()
+        try:
+            await _Metered(self.app(scope, receive, send_with_trace_id), trace)
+        finally:
+            _sampler.exit()
+            current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.started
+            self._finish(trace)
+
+    def _finish(self, trace: RequestTrace):
+        slow = trace.duration * 1000 >= settings.PROFILE_SLOW_MS
+        incr_metric(f"traces_{trace.reason}")
+
+        if trace.reason == "requested" or slow:
+            if slow:
+                incr_metric("traces_slow")
+                print(f"[PROFILE] Slow request {trace.path}?{trace.query} "
+                      f"{trace.duration * 1000:.0f} ms → trace {trace.id}")
+            store_trace(trace)
@@ -0,0 +1,175 @@
+# project/backend/benchmarks/bench_admission.py
+#
+# Load-shedding benchmark: analyst tail latency under a scanner flood.
+#
+# Runs the app in-process (httpx ASGI transport) against simulated backends:
+# threat feeds answer in ~FEED_MS, and the LLM is a provider with a fixed
+# number of concurrent slots (LLM_CONCURRENCY) taking ~LLM_MS per call, like
+# a rate-limited API. A scanner floods unique cache-miss IPs from one
+# untrusted address, rotating X-Client-Id, claiming X-Priority: interactive
+# and ignoring Retry-After. Analysts behind a trusted proxy
+# (ADMISSION_TRUSTED_CLIENTS) send lookups at a steady pace. Each mode
+# reports the analysts' p50/p99 and how the flood was handled.
+#
+# Usage (from backend/, Redis running):
+#   python -m benchmarks.bench_admission --flood-concurrency 64 --duration 15
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from app.cache.redis_cache import redis_cache
+from app.config.settings import settings
+from app.services import ip_analyzer_service
+from app.services.admission import GLOBAL_KEY
+
+
+def make_backends(feed_ms: float, llm_ms: float, llm_concurrency: int):
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+
+    async def feeds(ip):
+        await asyncio.sleep(feed_ms / 1000 * random.uniform(0.5, 1.5))
+        return {
+            "data": {
+                "abuseipdb": {"abuseConfidenceScore": random.randint(0, 100), "totalReports": 3},
+                "ipapi": {"country": "US"},
+            },
+            "sources": {"contributed": ["abuseipdb", "ipapi"], "cached": [], "failed": [], "pending": []},
+        }
+
+    async def llm(*args, **kwargs):
+        async with llm_slots:
+            await asyncio.sleep(llm_ms / 1000 * random.uniform(0.8, 1.2))
+        return {
+            "risk_level": "Low",
+            "risk_analysis": "Simulated assessment",
+            "recommendations": [],
+            "confidence": 0.8,
+            "model_used": "gpt-4.1-mini",
+        }
+
+    return feeds, llm
+
+
+def ip_stream(second_octet: int):
+    # Unique public addresses → every request is a cache miss
+    for i in range(250 * 250):
+        yield f"45.{second_octet}.{i // 250}.{i % 250 + 1}"
+
+
+def clear_verdicts(second_octet: int):
+    for key in redis_cache.client.scan_iter(f"ipintel:*:45.{second_octet}.*", count=1000):
+        redis_cache.client.delete(key)
+
+
+def percentile(values, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] * 1000 if values else 0.0
+
+
+async def run_mode(app, args, admission_enabled: bool, octets):
+    settings.ADMISSION_ENABLED = admission_enabled
+    redis_cache.client.delete(GLOBAL_KEY)
+    for octet in octets:
+        clear_verdicts(octet)
+
+    flood_ips, interactive_ips = ip_stream(octets[0]), ip_stream(octets[1])
+    flood_outcomes, interactive_outcomes = Counter(), Counter()
+    interactive_latencies = []
+    analyst_ids = iter(range(10 ** 9))
+    stop_at = time.perf_counter() + args.duration
+
+    # Separate transports so the two sides have different peer addresses
+    scanner = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=("203.0.113.7", 40000)),
+        base_url="http://bench", timeout=120,
+    )
+    proxy = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app, client=("10.1.2.3", 40000)),
+        base_url="http://bench", timeout=120,
+    )
+    async with scanner, proxy:
+
+        async def flood_worker():
+            while time.perf_counter() < stop_at:
+                # Tries to dodge the per-client limit and claim the interactive reserve
+                headers = {"X-Client-Id": uuid.uuid4().hex, "X-Priority": "interactive"}
+                resp = await scanner.get("/api/analyze-ip", params={"ip": next(flood_ips)}, headers=headers)
+                flood_outcomes[resp.status_code] += 1
+                if resp.status_code == 429:
+                    await asyncio.sleep(0.05)  # ignores Retry-After
+
+        async def interactive_request():
+            start = time.perf_counter()
+            resp = await proxy.get(
+                "/api/analyze-ip", params={"ip": next(interactive_ips)},
+                headers={"X-Client-Id": f"analyst-{next(analyst_ids) % args.analysts}"},
+            )
+            interactive_latencies.append(time.perf_counter() - start)
+            body = resp.json() if resp.status_code == 200 else {}
+            interactive_outcomes[body.get("degraded") or resp.status_code] += 1
+
+        async def analyst():
+            await asyncio.sleep(1.0)  # let the flood build up first
+            pending = []
+            # Fixed schedule, so a busy loop does not quietly lower the analyst rate
+            next_at = time.perf_counter()
+            while next_at < stop_at:
+                pending.append(asyncio.create_task(interactive_request()))
+                next_at += 1 / args.interactive_rps
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            await asyncio.gather(*pending)
+
+        await asyncio.gather(analyst(), *(flood_worker() for _ in range(args.flood_concurrency)))
+
+    return {
+        "interactive_p50_ms": percentile(interactive_latencies, 0.50),
+        "interactive_p99_ms": percentile(interactive_latencies, 0.99),
+        "interactive": dict(interactive_outcomes),
+        "flood": dict(flood_outcomes),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Admission control / load shedding benchmark")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--flood-concurrency", type=int, default=64)
+    parser.add_argument("--interactive-rps", type=float, default=4)
+    parser.add_argument("--analysts", type=int, default=4)
+    parser.add_argument("--feed-ms", type=float, default=100)
+    parser.add_argument("--llm-ms", type=float, default=1000)
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    # Admission sized to what the simulated LLM provider can actually serve
+    settings.ADMISSION_GLOBAL_LIMIT = args.llm_concurrency
+    settings.ADMISSION_INTERACTIVE_RESERVED = max(1, args.llm_concurrency // 4)
+    settings.ADMISSION_PER_CLIENT_LIMIT = max(1, args.llm_concurrency // 2)
+    settings.ADMISSION_TRUSTED_CLIENTS = ["10.0.0.0/8"]
+    settings.RATE_LIMIT_PER_MINUTE = 0
+    settings.LOCAL_MODEL_PATH = None
+
+    feeds, llm = make_backends(args.feed_ms, args.llm_ms, args.llm_concurrency)
+    ip_analyzer_service.gather_threat_feeds = feeds
+    ip_analyzer_service.generate_risk_assessment = llm
+
+    from main import app
+
+    results = {
+        "off": await run_mode(app, args, admission_enabled=False, octets=(33, 34)),
+        "on": await run_mode(app, args, admission_enabled=True, octets=(35, 36)),
+    }
+
+    print(f"\n{'admission':>10} {'p50 ms':>9} {'p99 ms':>9}  analyst outcomes / flood outcomes")
+    for mode, r in results.items():
+        print(f"{mode:>10} {r['interactive_p50_ms']:>9.0f} {r['interactive_p99_ms']:>9.0f}  "
+              f"{r['interactive']} / {r['flood']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+# project/backend/benchmarks/bench_ip_validation.py
+#
+# Per-call validate_ip() vs vectorized validate_ips() on a large batch.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_ip_validation --count 1000000
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.utils.ip_validator import validate_ip, validate_ips
+
+
+def random_ips(count: int, seed: int = 7):
+    """
+    Log-like mix: mostly IPv4 (incl. private/reserved), some IPv6, a few
+    malformed entries.
+    """
+    rng = random.Random(seed)
+    ips = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.80:
+            ips.append(".".join(str(rng.randrange(256)) for _ in range(4)))
+        elif roll < 0.97:
+            ips.append(":".join(f"{rng.randrange(65536):x}" for _ in range(8)))
+        else:
+            ips.append(rng.choice(["999.1.1.1", "not-an-ip", "1.2.3", "", "::g"]))
+    return ips
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk IP validation benchmark")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    ips = random_ips(args.count)
+
+    start = time.perf_counter()
+    per_call = np.array([validate_ip(ip) for ip in ips])
+    per_call_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk, _ = validate_ips(ips)
+    bulk_s = time.perf_counter() - start
+
+    mismatches = int((per_call != bulk).sum())
+
+    print(f"addresses:     {args.count:,}")
+    print(f"validate_ip:   {per_call_s:8.2f}s  ({args.count / per_call_s:,.0f}/s)")
+    print(f"validate_ips:  {bulk_s:8.2f}s  ({args.count / bulk_s:,.0f}/s)")
+    print(f"speedup:       {per_call_s / bulk_s:8.1f}x")
+    print(f"mismatches:    {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# project/backend/benchmarks/bench_workers.py
+#
+# Throughput scaling benchmark: 1 → N gunicorn workers.
+#
+# Seeds Redis with valid verdicts for a pool of synthetic public IPs, then for
+# each worker count starts the real server (gunicorn.conf.py), floods
+# /api/analyze-ip with cache-hit traffic and reports req/s + latency.
+# Cache hits are the hot path that is CPU-bound in Python (Redis read, JSON
+# decode, validation, response serialization), so they expose core scaling.
+#
+# Usage (from backend/, Redis running):
+#   python -m benchmarks.bench_workers --workers 1,2,4 --requests 5000
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.cache.redis_cache import cache_set
+
+
+def synthetic_ips(count: int):
+    # 45.33.0.0/16 is public address space → passes validate_ip
+    return [f"45.33.{i // 250}.{i % 250 + 1}" for i in range(count)]
+
+
+def seed_cache(ips):
+    verdict = {
+        "risk_level": "Low",
+        "risk_analysis": "Benchmark entry. " * 40,
+        "recommendations": ["Monitor"] * 5,
+        "confidence": 0.9,
+        "model_used": "gpt-4.1-mini",
+        "raw_sources": {"abuseipdb": {"abuseConfidenceScore": 0, "reports": list(range(200))}},
+    }
+    for ip in ips:
+        cache_set(ip, {**verdict, "ip": ip}, model="openai", ttl=3600)
+
+
+async def wait_ready(base_url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become ready")
+
+
+async def run_load(base_url: str, ips, total: int, concurrency: int):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker(client):
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            resp = await client.get(f"{base_url}/api/analyze-ip", params={"ip": ips[i % len(ips)]})
+            latencies.append(time.perf_counter() - start)
+            if resp.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def start_server(workers: int, port: int):
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "LLM_STARTUP_CHECK": "false",
+        "RATE_LIMIT_PER_MINUTE": "0",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+         "--access-logfile", "/dev/null", "main:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Worker scaling benchmark")
+    parser.add_argument("--workers", default=f"1,{os.cpu_count()}")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--ips", type=int, default=500)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    ips = synthetic_ips(args.ips)
+    seed_cache(ips)
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    baseline = None
+
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'scale':>6}")
+    for count in [int(w) for w in args.workers.split(",")]:
+        proc = start_server(count, args.port)
+        try:
+            await wait_ready(base_url)
+            await run_load(base_url, ips, min(500, args.requests), args.concurrency)  # warm-up
+            result = await run_load(base_url, ips, args.requests, args.concurrency)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        baseline = baseline or result["rps"]
+        print(f"{count:>8} {result['rps']:>10.1f} {result['p50_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['errors']:>7} {result['rps'] / baseline:>5.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
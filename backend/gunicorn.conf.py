@@ -0,0 +1,26 @@
+# project/backend/gunicorn.conf.py
+#
+# Multi-process deployment: one uvicorn event loop per CPU core.
+# All cross-request state (single-flight locks, rate limits, metrics, cache)
+# lives in Redis, so workers can be added or removed freely.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# WEB_CONCURRENCY=0 (default) → size to the cores available to the container
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or multiprocessing.cpu_count()
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# LLM analyses can take well over the default 30s
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 180))
+graceful_timeout = 30
+keepalive = 5
+
+# Do NOT preload: the Redis pool and OpenAI client must be created per worker,
+# after fork, so no sockets are shared between processes.
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"
@@ -1,12 +1,30 @@
 # project/backend/main.py
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from openai import AsyncOpenAI
 
 from app.routes.analyze_ip import router as analyze_ip_router
+from app.routes.analyze_network import router as analyze_network_router
+from app.routes.debug_traces import router as debug_traces_router
 from app.config.settings import settings
+from app.cache.shared_state import get_metrics
+from app.cache.migrations import run_sweep_once
+from app.services.admission import AdmissionContextMiddleware, admission
+from app.utils.profiling import ProfilingMiddleware
+
+
+# Keeps startup background tasks referenced until they finish
+_background = set()
+
+
+def _log_task_failure(task: asyncio.Task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[STARTUP ERROR] Background task {task.get_name()} failed: {task.exception()!r}")
 
 
 @asynccontextmanager
@@ -16,20 +34,31 @@ async def lifespan(app: FastAPI):
     """
 
     # -------- Startup: Check LLM Connection --------
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    test_model = "gpt-4.1-mini"
-
-    try:
-        resp = await client.chat.completions.create(
-            model=test_model,
-            messages=[{"role": "user", "content": "ping"}],
-            max_tokens=1
-        )
-        print(f"[STARTUP] LLM connectivity OK → {test_model}")
-
-    except Exception as e:
-        print(f"[STARTUP ERROR] Failed to reach LLM: {e}")
-        raise RuntimeError("LLM model connection failed. Server will not start.")
+    # Runs once per worker process; disable with LLM_STARTUP_CHECK=false
+    # (benchmarks, offline environments).
+    if settings.LLM_STARTUP_CHECK:
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        test_model = "gpt-4.1-mini"
+
+        try:
+            resp = await client.chat.completions.create(
+                model=test_model,
+                messages=[{"role": "user", "content": "ping"}],
+                max_tokens=1
+            )
+            print(f"[STARTUP] LLM connectivity OK → {test_model}")
+
+        except Exception as e:
+            print(f"[STARTUP ERROR] Failed to reach LLM: {e}")
+            raise RuntimeError("LLM model connection failed. Server will not start.")
+
+    # -------- Startup: Background Cache Migration --------
+    # SCAN-based upgrade of old-schema entries; a Redis lock makes sure only
+    # one worker process runs it.
+    if settings.CACHE_MIGRATION_SWEEP:
+        task = asyncio.create_task(asyncio.to_thread(run_sweep_once), name="migration-sweep")
+        _background.add(task)
+        task.add_done_callback(_log_task_failure)
 
     yield  # -------- Application Running --------
 
@@ -56,10 +85,27 @@ app.add_middleware(
 )
 
 
+# Client identity + priority for admission control
+app.add_middleware(AdmissionContextMiddleware)
+
+# Opt-in per-request traces (outermost, so it times the whole request)
+app.add_middleware(ProfilingMiddleware)
+
+
 # API routes
 app.include_router(analyze_ip_router)
+app.include_router(analyze_network_router)
+app.include_router(debug_traces_router)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Counters aggregated across all worker processes (stored in Redis).
+    """
+    return {**get_metrics(), **admission.in_flight()}